@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark zone assignment: the original per-zone ray-casting loop from
+check_zone.py vs. the grid-indexed ZoneIndex.zones_of() vs. the vectorized
+ZoneIndex.assign_zones().
+
+Zones are synthetic city-sized polygons around Nashik, written out as
+closed-ring WKT the way ST_AsText returns them. The reference is a verbatim
+copy of check_zone.py's original parse_wkt/is_point_in_polygon. Besides
+random points, every vertex and edge midpoint is tested against all
+methods, so boundary handling is compared too. Any disagreement fails
+the run.
+
+Usage:
+    python3 benchmark-zone-lookup.py
+    python3 benchmark-zone-lookup.py --points 500000 --zones 200 --vertices 64
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from zone_lookup import NO_ZONE, ZoneIndex, parse_wkt
+
+CENTER_LAT, CENTER_LON = 19.9975, 73.7898
+SPREAD_DEGREES = 0.6
+LOOP_SAMPLE = 5_000  # The original loop only runs on a sample of the random points; it is far too slow for all
+
+
+# Reference: check_zone.py before zone_lookup.py existed, copied verbatim
+
+def original_parse_wkt(wkt):
+    if not wkt or not wkt.startswith('POLYGON'):
+        return []
+    content = wkt.replace('POLYGON((', '').replace('))', '')
+    points = []
+    for pair in content.split(','):
+        parts = pair.strip().split(' ')
+        points.append((float(parts[0]), float(parts[1])))
+    return points
+
+def is_point_in_polygon(x, y, polygon):
+    inside = False
+    n = len(polygon)
+    p1x, p1y = polygon[0]
+    for i in range(n + 1):
+        p2x, p2y = polygon[i % n]
+        if y > min(p1y, p2y):
+            if y <= max(p1y, p2y):
+                if x <= max(p1x, p2x):
+                    if p1y != p2y:
+                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                    if p1x == p2x or x <= xinters:
+                        inside = not inside
+        p1x, p1y = p2x, p2y
+    return inside
+
+
+def make_zones(count: int, vertices: int, rng: random.Random):
+    """(zone_id, WKT) with closed outer rings, as ST_AsText returns them"""
+    zones = []
+    for zone_id in range(1, count + 1):
+        center_x = CENTER_LON + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES)
+        center_y = CENTER_LAT + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES)
+        polygon = []
+        for k in range(vertices):
+            angle = 2 * math.pi * k / vertices
+            radius = rng.uniform(0.02, 0.12)
+            # Rounded like the coordinates zones are drawn with, so shared x/y values and vertical edges occur
+            polygon.append((round(center_x + radius * math.cos(angle), 4),
+                            round(center_y + radius * math.sin(angle), 4)))
+        ring = polygon + polygon[:1]
+        zones.append((zone_id, "POLYGON((" + ",".join(f"{x} {y}" for x, y in ring) + "))"))
+    return zones
+
+
+def random_points(count: int, rng: random.Random):
+    return [(CENTER_LAT + rng.uniform(-SPREAD_DEGREES - 0.1, SPREAD_DEGREES + 0.1),
+             CENTER_LON + rng.uniform(-SPREAD_DEGREES - 0.1, SPREAD_DEGREES + 0.1)) for _ in range(count)]
+
+
+def boundary_points(zones):
+    """Every vertex and edge midpoint of every zone, as (lat, lon)"""
+    points = []
+    for _, wkt in zones:
+        ring = original_parse_wkt(wkt)
+        for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+            points.append((y1, x1))
+            points.append(((y1 + y2) / 2, (x1 + x2) / 2))
+    return points
+
+
+def linear_scan(polygons, lat: float, lon: float):
+    """What check_zone.py used to do (minus re-parsing): every zone in id order, first match wins"""
+    for zone_id, polygon in polygons:
+        if is_point_in_polygon(lon, lat, polygon):
+            return zone_id
+    return None
+
+
+def timed(label: str, count: int, fn, unit: str = "point"):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {count:>10,} {unit}s  {elapsed:>8.3f}s  {elapsed / count * 1e6:>9.2f} µs/{unit}")
+    return result, elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark zone assignment methods")
+    parser.add_argument("--points", type=int, default=200_000, help="Random points to assign (default: 200000)")
+    parser.add_argument("--zones", type=int, default=100, help="Synthetic zones (default: 100)")
+    parser.add_argument("--vertices", type=int, default=32, help="Vertices per zone (default: 32)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    zones = make_zones(args.zones, args.vertices, rng)
+    boundary = boundary_points(zones)
+    points = random_points(args.points, rng) + boundary
+    lats = np.array([lat for lat, _ in points])
+    lons = np.array([lon for _, lon in points])
+
+    print(f"{'='*70}")
+    print(f"  Zone assignment benchmark: {len(points):,} points, {args.zones} zones x {args.vertices} vertices")
+    print(f"{'='*70}")
+
+    index, _ = timed("build ZoneIndex", args.zones,
+                     lambda: ZoneIndex((zone_id, parse_wkt(wkt)) for zone_id, wkt in zones), unit="zone")
+    polygons = [(zone_id, original_parse_wkt(wkt)) for zone_id, wkt in zones]
+    # Random sample plus every boundary point; `points` ends with the boundary points
+    sample = points[:LOOP_SAMPLE] + boundary
+    sample_at = list(range(min(LOOP_SAMPLE, args.points))) + list(range(args.points, len(points)))
+    expected, loop_time = timed("original loop (sample)", len(sample),
+                                lambda: [linear_scan(polygons, lat, lon) for lat, lon in sample])
+    grid, grid_time = timed("ZoneIndex.zones_of", len(points), lambda: index.zones_of(points))
+    vectorized, vector_time = timed("ZoneIndex.assign_zones", len(points), lambda: index.assign_zones(lats, lons))
+
+    vectorized = [None if zone_id == NO_ZONE else int(zone_id) for zone_id in vectorized]
+    mismatches = sum(1 for a, i in zip(expected, sample_at) if a != grid[i])
+    mismatches += sum(1 for b, c in zip(grid, vectorized) if b != c)
+
+    loop_per_point = loop_time / len(sample)
+    print(f"{'='*70}")
+    print(f"Assigned: {sum(z is not None for z in grid):,}/{len(points):,} points inside a zone")
+    print(f"Speedup vs. original loop: grid {loop_per_point * len(points) / grid_time:,.0f}x, "
+          f"vectorized {loop_per_point * len(points) / vector_time:,.0f}x")
+    if mismatches:
+        print(f"❌ {mismatches:,} points assigned differently")
+        return 1
+    print(f"✅ All methods agree with the original on every point checked "
+          f"(including {len(boundary):,} vertices and edge midpoints)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""
+Shared OpenSearch bulk indexer for the Mangwale Search sync scripts.
+
+- Flushes by payload size instead of document count, so batches of large
+  vector documents and small store documents both land near the target size
+- Runs several _bulk requests concurrently
+- Retries only the items rejected with 429 (es_rejected_execution_exception),
+  and whole requests rejected with 429/502/503/504, with exponential backoff
+- Shrinks the payload size while the cluster is rejecting and grows it back
+  once requests go through cleanly
+- Reports real per-item success instead of trusting the HTTP status
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, NamedTuple, Optional
+
+import requests
+
+OPENSEARCH_URL = os.getenv("OPENSEARCH_URL", "http://localhost:9200")
+
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024  # Target _bulk payload size
+MIN_BYTES = 256 * 1024  # Never shrink payloads below this while backing off
+DEFAULT_CONCURRENCY = 4  # Concurrent in-flight _bulk requests
+DEFAULT_MAX_RETRIES = 6
+INITIAL_BACKOFF = 0.5  # Seconds, doubled on every retry
+MAX_BACKOFF = 30.0
+
+RETRYABLE_REQUEST_STATUSES = {429, 502, 503, 504}
+MAX_ERROR_SAMPLES = 5
+
+
+class BulkEntry(NamedTuple):
+    """One encoded bulk action (action line plus optional source line)"""
+    op: str
+    index: str
+    id: str
+    data: bytes
+
+
+class BulkFailure(NamedTuple):
+    op: str
+    index: str
+    id: str
+    status: Optional[int]
+    error: str
+
+
+class BulkResult:
+    """Per-item outcome of one or more _bulk requests"""
+
+    def __init__(self):
+        self.succeeded = 0
+        self.failures: List[BulkFailure] = []
+        self.retried = 0
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+    def merge(self, other: "BulkResult"):
+        self.succeeded += other.succeeded
+        self.failures.extend(other.failures)
+        self.retried += other.retried
+
+
+def encode_entry(action: Dict, source: Optional[Dict] = None) -> BulkEntry:
+    """Encode a bulk action such as {"index": {"_index": ..., "_id": ...}} with its source"""
+    op, meta = next(iter(action.items()))
+    data = json.dumps(action).encode("utf-8") + b"\n"
+    if source is not None:
+        data += json.dumps(source, default=str).encode("utf-8") + b"\n"
+    return BulkEntry(op, meta.get("_index", ""), str(meta.get("_id", "")), data)
+
+
+class BulkIndexer:
+    """
+    Buffered, concurrent, retrying bulk writer.
+
+    Usage:
+        with BulkIndexer(name="food_items") as indexer:
+            for doc in docs:
+                indexer.index("food_items", doc["id"], doc)
+        print(indexer.result.succeeded, indexer.result.failed)
+
+    add()/index()/update()/delete() buffer entries and hand a full buffer to
+    a worker thread; they block while `concurrency` requests are in flight.
+    send() is a synchronous alternative for callers that manage their own
+    batching and threads and need the result of a specific batch.
+    """
+
+    def __init__(self, url: str = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 concurrency: int = DEFAULT_CONCURRENCY, max_retries: int = DEFAULT_MAX_RETRIES,
+                 timeout: int = 120, name: str = None, verbose: bool = True):
+        self.url = (url or OPENSEARCH_URL).rstrip("/")
+        self.max_bytes = max_bytes
+        self.target_bytes = max_bytes
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.name = name
+        self.verbose = verbose
+
+        self.lock = threading.Lock()
+        self.buffer: List[BulkEntry] = []
+        self.buffer_bytes = 0
+        self.local = threading.local()
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk")
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.futures: List[Future] = []
+
+        # Totals across every request sent by this indexer
+        self.result = BulkResult()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.rejections = 0
+        self.error_samples = 0
+
+    # Buffered API
+
+    def index(self, index: str, doc_id, doc: Dict):
+        self.add({"index": {"_index": index, "_id": str(doc_id)}}, doc)
+
+    def update(self, index: str, doc_id, doc: Dict, doc_as_upsert: bool = False):
+        body = {"doc": doc}
+        if doc_as_upsert:
+            body["doc_as_upsert"] = True
+        self.add({"update": {"_index": index, "_id": str(doc_id)}}, body)
+
+    def delete(self, index: str, doc_id):
+        self.add({"delete": {"_index": index, "_id": str(doc_id)}})
+
+    def add(self, action: Dict, source: Optional[Dict] = None):
+        entry = encode_entry(action, source)
+        batch = None
+        with self.lock:
+            if self.buffer and self.buffer_bytes + len(entry.data) > self.target_bytes:
+                batch = self.buffer
+                self.buffer, self.buffer_bytes = [], 0
+            self.buffer.append(entry)
+            self.buffer_bytes += len(entry.data)
+        if batch:
+            self._submit(batch)
+
+    def flush(self) -> BulkResult:
+        """Send whatever is buffered and wait for every in-flight request"""
+        with self.lock:
+            batch = self.buffer
+            self.buffer, self.buffer_bytes = [], 0
+        if batch:
+            self._submit(batch)
+        with self.lock:
+            futures, self.futures = self.futures, []
+        for future in futures:
+            future.result()
+        return self.result
+
+    def close(self) -> BulkResult:
+        try:
+            self.flush()
+        finally:
+            self.executor.shutdown(wait=True)
+        return self.result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _submit(self, batch: List[BulkEntry]):
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(self._send_and_release, batch)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            done = [f for f in self.futures if f.done()]
+            self.futures = [f for f in self.futures if not f.done()]
+            self.futures.append(future)
+        for f in done:
+            f.result()  # Re-raises anything _send_and_release didn't record
+
+    def _send_and_release(self, batch: List[BulkEntry]):
+        try:
+            self.send_entries(batch)
+        except Exception as e:
+            # Count the batch as failed instead of losing it with the future
+            result = BulkResult()
+            for entry in batch:
+                self._fail(result, entry, None, f"{type(e).__name__}: {e}")
+            with self.lock:
+                self.result.merge(result)
+        finally:
+            self.slots.release()
+
+    # Synchronous API
+
+    def send(self, actions: List[tuple]) -> BulkResult:
+        """Send (action, source) pairs now, split by payload size, and return their result"""
+        entries = [encode_entry(action, source) for action, source in actions]
+        result = BulkResult()
+        chunk, chunk_bytes = [], 0
+        for entry in entries:
+            if chunk and chunk_bytes + len(entry.data) > self.target_bytes:
+                result.merge(self.send_entries(chunk))
+                chunk, chunk_bytes = [], 0
+            chunk.append(entry)
+            chunk_bytes += len(entry.data)
+        if chunk:
+            result.merge(self.send_entries(chunk))
+        return result
+
+    def send_entries(self, entries: List[BulkEntry]) -> BulkResult:
+        """Send one batch, retrying rejected items with exponential backoff"""
+        result = BulkResult()
+        pending = entries
+        attempt = 0
+
+        while pending:
+            retry, status, error = self._post(pending, result)
+            if not retry:
+                break
+
+            attempt += 1
+            if attempt > self.max_retries:
+                for entry in retry:
+                    self._fail(result, entry, status, error or "rejected after retries")
+                break
+
+            result.retried += len(retry)
+            backoff = min(MAX_BACKOFF, INITIAL_BACKOFF * 2 ** (attempt - 1))
+            time.sleep(backoff * random.uniform(0.5, 1.0))
+            pending = retry
+
+        with self.lock:
+            self.result.merge(result)
+            total_ok = self.result.succeeded
+        if self.verbose:
+            prefix = f"{self.name}: " if self.name else ""
+            status = "✅" if not result.failed else "⚠️ "
+            print(f"{status} {prefix}bulk of {len(entries)} → {result.succeeded} ok, {result.failed} failed"
+                  f"{f', {result.retried} retried' if result.retried else ''} (total ok: {total_ok:,})")
+        return result
+
+    def _post(self, entries: List[BulkEntry], result: BulkResult):
+        """
+        POST one _bulk request. Returns the entries to retry, their status
+        (None for transport errors and unreadable replies) and the reason.
+        """
+        body = b"".join(entry.data for entry in entries)
+        try:
+            response = self._session().post(
+                f"{self.url}/_bulk",
+                data=body,
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            self._record_request(len(body), rejected=False)
+            self._shrink()  # Often a timeout on a payload the cluster is too busy for
+            return entries, None, str(e)
+
+        self._record_request(len(body), rejected=response.status_code == 429)
+        if response.status_code in RETRYABLE_REQUEST_STATUSES:
+            return entries, response.status_code, f"HTTP {response.status_code}"
+        if response.status_code != 200:
+            for entry in entries:
+                self._fail(result, entry, response.status_code, response.text[:200])
+            return [], None, None
+
+        try:
+            items = response.json().get("items")
+        except (ValueError, AttributeError):
+            items = None
+        if not isinstance(items, list) or len(items) != len(entries):
+            # Not a _bulk response (e.g. a proxy error page); every action is idempotent, so resend them all
+            return entries, None, f"malformed _bulk response: {response.text[:100]}"
+
+        retry = []
+        for entry, item in zip(entries, items):
+            outcome = item.get(entry.op, {})
+            status = outcome.get("status", 500)
+            if 200 <= status < 300 or (entry.op == "delete" and status == 404):
+                result.succeeded += 1
+            elif status == 429:
+                retry.append(entry)
+            else:
+                self._fail(result, entry, status, json.dumps(outcome.get("error", outcome)))
+
+        if retry:
+            self._shrink()
+        else:
+            self._grow()
+        return retry, 429, "es_rejected_execution_exception" if retry else None
+
+    def _fail(self, result: BulkResult, entry: BulkEntry, status: Optional[int], error: str):
+        result.failures.append(BulkFailure(entry.op, entry.index, entry.id, status, error))
+        with self.lock:
+            self.error_samples += 1
+            show = self.error_samples <= MAX_ERROR_SAMPLES
+        if show and self.verbose:
+            print(f"⚠️  {entry.op} {entry.index}/{entry.id} failed ({status}): {error[:200]}")
+
+    def _record_request(self, size: int, rejected: bool):
+        with self.lock:
+            self.requests += 1
+            self.bytes_sent += size
+            if rejected:
+                self.rejections += 1
+        if rejected:
+            self._shrink()
+
+    def _shrink(self):
+        with self.lock:
+            self.target_bytes = max(min(MIN_BYTES, self.max_bytes), self.target_bytes // 2)
+
+    def _grow(self):
+        with self.lock:
+            self.target_bytes = min(self.max_bytes, int(self.target_bytes * 1.25))
+
+    def _session(self) -> requests.Session:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def stats(self) -> Dict:
+        return {
+            "succeeded": self.result.succeeded,
+            "failed": self.result.failed,
+            "retried": self.result.retried,
+            "requests": self.requests,
+            "rejections": self.rejections,
+            "bytes_sent": self.bytes_sent,
+            "target_bytes": self.target_bytes
+        }
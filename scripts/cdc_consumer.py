@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Debezium CDC consumer: mirrors MySQL changes to items, stores and categories
+into OpenSearch within a fraction of a second.
+
+- Reads Debezium JSON change events (Kafka/Redpanda, or a JSON-lines file /
+  in-memory list that stands in for Kafka)
+- Coalesces events for the same row within a short window, so a burst of
+  edits to one item becomes a single write
+- Builds documents with the sync engine's transforms, so CDC and full
+  syncs produce identical documents
+- Store edits that change the fields items copy (name, location, zone,
+  delivery time) are fanned out to just that store's items
+- Writes each window with batched _bulk requests and commits the source
+  offsets only after the writes succeeded (at-least-once; every write is
+  an idempotent upsert or delete)
+
+Usage:
+    python3 cdc_consumer.py                          # Kafka (KAFKA_BROKER, CDC_GROUP_ID)
+    python3 cdc_consumer.py --file events.jsonl      # replay a file of change events
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from bulk_indexer import BulkFailure, BulkIndexer, BulkResult
+from job_state import load_state, save_state, state_path
+from sync_engine import (ENTITIES, ITEM_STORE_FIELDS, MODULE_GROUPS, OPENSEARCH_URL, fan_out_stores,
+                         item_store_fields, mysql_time_zone, to_int)
+
+KAFKA_BROKER = os.getenv("KAFKA_BROKER", "localhost:9092")
+GROUP_ID = os.getenv("CDC_GROUP_ID", "cdc-opensearch-py")
+TOPIC_PREFIX = os.getenv("CDC_TOPIC_PREFIX", "mangwale.mangwale")
+TABLES = ["items", "stores", "categories"]
+
+WINDOW_SECONDS = 0.2  # Coalescing window; also the worst-case added latency
+MAX_BATCH_EVENTS = 5000
+RETRY_DELAY = 2.0
+
+# MySQL TIME columns arrive as milliseconds since midnight (time.precision.mode=connect)
+TIME_COLUMNS = {"available_time_starts", "available_time_ends"}
+
+# Row timestamps arrive as ZonedTimestamp UTC strings ("...Z", TIMESTAMP
+# columns) or epoch milliseconds of the wall-clock value (DATETIME columns)
+TIMESTAMP_COLUMNS = {"created_at", "updated_at"}
+EPOCH = datetime(1970, 1, 1)
+
+# Item fields that come from the categories JOIN in a full sync
+ITEM_CATEGORY_FIELDS = ["category_name"]
+
+
+class ChangeEvent(NamedTuple):
+    """One row change. `position` is whatever the source needs to commit it."""
+    table: str
+    op: str  # c (create), u (update), d (delete), r (snapshot read)
+    before: Optional[Dict]
+    after: Optional[Dict]
+    position: Any
+
+    @property
+    def key(self) -> Tuple[str, Any]:
+        return self.table, (self.after or self.before or {}).get("id")
+
+
+def parse_event(topic: Optional[str], value, position) -> Optional[ChangeEvent]:
+    """Decode a Debezium JSON value (with or without the schema envelope)"""
+    if value is None:
+        return None  # tombstone
+    if isinstance(value, (bytes, str)):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    payload = value.get("payload", value)
+    if not isinstance(payload, dict) or "op" not in payload:
+        return None
+
+    table = (payload.get("source") or {}).get("table") or (topic or "").rsplit(".", 1)[-1]
+    if table not in TABLES:
+        return None
+    return ChangeEvent(table, payload["op"], payload.get("before"), payload.get("after"), position)
+
+
+def normalize_row(row: Optional[Dict], time_zone: tzinfo = timezone.utc) -> Optional[Dict]:
+    """
+    Turn Debezium's encodings back into what mysql.connector returns for the
+    same row. `time_zone` is the zone full syncs read TIMESTAMP columns in,
+    so both paths write the same naive timestamps.
+    """
+    if row is None:
+        return None
+    normalized = {}
+    for column, value in row.items():
+        if isinstance(value, bool):
+            value = int(value)
+        elif column in TIME_COLUMNS and isinstance(value, int):
+            value = str(timedelta(milliseconds=value))
+        elif column in TIMESTAMP_COLUMNS and isinstance(value, int):
+            value = EPOCH + timedelta(milliseconds=value)
+        elif column in TIMESTAMP_COLUMNS and isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                pass
+            else:
+                if value.tzinfo:
+                    value = value.astimezone(time_zone).replace(tzinfo=None)
+        normalized[column] = value
+    return normalized
+
+
+def coalesce(events: Iterable[ChangeEvent]) -> List[ChangeEvent]:
+    """
+    Collapse events per row: keep the first `before` (where the row was
+    indexed) and the last op/`after` (what it is now).
+    """
+    merged: Dict[Tuple[str, Any], ChangeEvent] = {}
+    for event in events:
+        first = merged.get(event.key)
+        merged[event.key] = event._replace(before=first.before) if first and first.before else event
+    return list(merged.values())
+
+
+# Event sources
+
+class MemoryEventSource:
+    """In-memory stand-in for Kafka: a list of (topic, value) pairs"""
+
+    def __init__(self, messages: List[Tuple[Optional[str], Any]]):
+        self.messages = messages
+        self.next = 0
+        self.committed = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.next >= len(self.messages)
+
+    def poll(self, max_events: int, timeout: float) -> List[ChangeEvent]:
+        end = min(len(self.messages), self.next + max_events)
+        events = [parse_event(topic, value, i) for i, (topic, value) in enumerate(self.messages[self.next:end], self.next)]
+        self.next = end
+        return [event for event in events if event]
+
+    def commit(self, events: List[ChangeEvent]):
+        self.committed = events[-1].position + 1
+
+    def rewind(self, events: List[ChangeEvent]):
+        """Forget everything after the last commit, as Kafka does for an uncommitted consumer"""
+        self.next = self.committed
+
+    def close(self):
+        pass
+
+
+class FileEventSource(MemoryEventSource):
+    """
+    JSON-lines file of Debezium values (or {"topic": ..., "value": ...}
+    wrappers). The committed line is persisted, so a rerun resumes after it.
+    """
+
+    def __init__(self, path: str):
+        messages = []
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "value" in record and "topic" in record:
+                    messages.append((record["topic"], record["value"]))
+                else:
+                    messages.append((None, record))
+        super().__init__(messages)
+        self.state_file = state_path("cdc", os.path.basename(path))
+        self.committed = self.next = (load_state(self.state_file) or {}).get("committed", 0)
+
+    def commit(self, events: List[ChangeEvent]):
+        super().commit(events)
+        save_state(self.state_file, {"committed": self.committed})
+
+
+class KafkaEventSource:
+    """Debezium topics on Kafka/Redpanda, committing offsets manually"""
+
+    finished = False
+
+    def __init__(self, brokers: str = KAFKA_BROKER, group_id: str = GROUP_ID, topic_prefix: str = TOPIC_PREFIX):
+        try:
+            from confluent_kafka import Consumer, TopicPartition
+        except ImportError:
+            sys.exit("❌ confluent-kafka is required for the Kafka source: pip install confluent-kafka")
+        self.TopicPartition = TopicPartition
+        self.consumer = Consumer({
+            "bootstrap.servers": brokers,
+            "group.id": group_id,
+            "enable.auto.commit": False,
+            "auto.offset.reset": "earliest"
+        })
+        self.consumer.subscribe([f"{topic_prefix}.{table}" for table in TABLES])
+
+    def poll(self, max_events: int, timeout: float) -> List[ChangeEvent]:
+        events = []
+        for message in self.consumer.consume(num_messages=max_events, timeout=timeout):
+            if message.error():
+                print(f"⚠️  Kafka error: {message.error()}")
+                continue
+            event = parse_event(message.topic(), message.value(),
+                                (message.topic(), message.partition(), message.offset()))
+            if event:
+                events.append(event)
+        return events
+
+    def commit(self, events: List[ChangeEvent]):
+        latest: Dict[Tuple[str, int], int] = {}
+        for topic, partition, offset in (event.position for event in events):
+            latest[(topic, partition)] = max(offset, latest.get((topic, partition), -1))
+        self.consumer.commit(offsets=[self.TopicPartition(topic, partition, offset + 1)
+                                      for (topic, partition), offset in latest.items()],
+                             asynchronous=False)
+
+    def rewind(self, events: List[ChangeEvent]):
+        """
+        Seek back so an unacknowledged window is redelivered: each partition
+        in the window goes back to its lowest offset there, the others to
+        their committed offset. A new consumer group has no committed
+        offsets yet (OFFSET_INVALID), so those can't be relied on alone.
+        """
+        lowest: Dict[Tuple[str, int], int] = {}
+        for topic, partition, offset in (event.position for event in events):
+            lowest[(topic, partition)] = min(offset, lowest.get((topic, partition), offset))
+        for partition in self.consumer.committed(self.consumer.assignment()):
+            if partition.offset >= 0 and (partition.topic, partition.partition) not in lowest:
+                self.consumer.seek(partition)
+        for (topic, partition), offset in lowest.items():
+            self.consumer.seek(self.TopicPartition(topic, partition, offset))
+
+    def close(self):
+        self.consumer.close()
+
+
+# Consumer
+
+class CdcConsumer:
+    """Turns windows of change events into bulk writes against the {group}_{entity} indices"""
+
+    def __init__(self, source, indexer: BulkIndexer = None, window: float = WINDOW_SECONDS,
+                 max_batch: int = MAX_BATCH_EVENTS, time_zone: Optional[tzinfo] = None):
+        self.source = source
+        # Only a live Kafka stream is worth a MySQL round trip; replays use MYSQL_TIME_ZONE or UTC
+        self.time_zone = time_zone or mysql_time_zone(ask_server=isinstance(source, KafkaEventSource))
+        self.indexer = indexer or BulkIndexer(OPENSEARCH_URL, name="cdc", verbose=False)
+        self.window = window
+        self.max_batch = max_batch
+        self.group_of = {module_id: group for group, ids in MODULE_GROUPS.items() for module_id in ids}
+
+        # Latest known stores/categories rows, for the item JOIN fields
+        self.stores: Dict[Any, Dict] = {}
+        self.categories: Dict[Any, Dict] = {}
+
+        # Stores whose item copies changed in the current window, per module group
+        self.fan_out: Dict[str, Dict[Any, Dict]] = {}
+
+        self.events = 0
+        self.writes = 0
+        self.windows = 0
+
+    def group(self, row: Optional[Dict]) -> Optional[str]:
+        return self.group_of.get(to_int((row or {}).get("module_id"), None))
+
+    def item_row(self, item: Dict) -> Tuple[Dict, List[str]]:
+        """The item as the full-sync JOIN would return it, plus the JOIN fields that are unknown here"""
+        store = self.stores.get(item.get("store_id"))
+        category = self.categories.get(item.get("category_id"))
+        row = dict(item)
+        row.update({
+            "store_name": store and store.get("name"),
+            "store_latitude": store and store.get("latitude"),
+            "store_longitude": store and store.get("longitude"),
+            "zone_id": store and store.get("zone_id"),
+            "delivery_time": store and store.get("delivery_time"),
+            "category_name": category and category.get("name")
+        })
+        unknown = (ITEM_STORE_FIELDS if store is None else []) + (ITEM_CATEGORY_FIELDS if category is None else [])
+        return row, unknown
+
+    def translate(self, event: ChangeEvent) -> List[Tuple[Dict, Optional[Dict]]]:
+        """Bulk (action, source) pairs for one coalesced event"""
+        spec = ENTITIES[event.table]
+        before, after = normalize_row(event.before, self.time_zone), normalize_row(event.after, self.time_zone)
+        row = after if event.op != "d" else None
+
+        if event.table == "stores" and row:
+            self.stores[row["id"]] = row
+            if before and self.group(row) and item_store_fields(before) != item_store_fields(row):
+                self.fan_out.setdefault(self.group(row), {})[row["id"]] = row
+        elif event.table == "categories" and row:
+            self.categories[row["id"]] = row
+
+        actions = []
+        old_group, new_group = self.group(before), self.group(row)
+        doc_id = str((row or before or {}).get("id"))
+
+        # Deleted, deactivated, or moved to another module group: remove the old copy
+        for group in {old_group, new_group} - {None}:
+            if row is None or to_int(row.get("status")) != 1 or group != new_group:
+                actions.append(({"delete": {"_index": spec.index_name(group), "_id": doc_id}}, None))
+
+        if row is None or new_group is None or to_int(row.get("status")) != 1:
+            return actions
+
+        if event.table == "items":
+            row, unknown = self.item_row(row)
+        else:
+            row, unknown = {**row, "module_name": None}, ["module_name"]  # modules isn't captured
+        doc = spec.transform(row)
+        for field in unknown:
+            doc.pop(field, None)  # Keep whatever the last full sync wrote
+
+        actions.append(({"update": {"_index": spec.index_name(new_group), "_id": doc_id}},
+                        {"doc": doc, "doc_as_upsert": True}))
+        return actions
+
+    def apply(self, events: List[ChangeEvent]) -> BulkResult:
+        # Stores and categories first, so items in the same window see their latest JOIN fields
+        order = {"stores": 0, "categories": 1, "items": 2}
+        batch = sorted(coalesce(events), key=lambda event: order[event.table])
+        actions = [action for event in batch for action in self.translate(event)]
+        result = self.indexer.send(actions) if actions else BulkResult()
+
+        fan_out, self.fan_out = self.fan_out, {}
+        for group, stores in fan_out.items():
+            if fan_out_stores(group, list(stores.values())) is None:
+                # Reported as retryable so the window isn't committed
+                result.failures.append(BulkFailure("update_by_query", ENTITIES["items"].index_name(group),
+                                                   "*", None, "store fan-out failed"))
+        return result
+
+    def collect(self) -> List[ChangeEvent]:
+        """Poll until the window closes or the batch is full"""
+        events = []
+        deadline = time.monotonic() + self.window
+        while len(events) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            polled = self.source.poll(self.max_batch - len(events), remaining)
+            events.extend(polled)
+            if not polled and self.source.finished:
+                break
+        return events
+
+    def run(self, stop_when_idle: bool = False):
+        print(f"🚀 CDC consumer → {self.indexer.url} (window {self.window * 1000:.0f}ms)")
+        try:
+            while True:
+                events = self.collect()
+                if not events:
+                    if stop_when_idle and self.source.finished:
+                        break
+                    continue
+
+                result = self.apply(events)
+                retryable = [f for f in result.failures if f.status is None or f.status >= 500 or f.status == 429]
+                if retryable:
+                    # Don't commit: the window is redelivered and rewritten, which is safe because writes are idempotent
+                    print(f"⚠️  {len(retryable)} writes failed ({retryable[0].error[:100]}), retrying window in {RETRY_DELAY}s")
+                    self.source.rewind(events)
+                    time.sleep(RETRY_DELAY)
+                    continue
+                for failure in result.failures:
+                    print(f"⚠️  Skipping {failure.index}/{failure.id}: {failure.status} {failure.error[:200]}")
+
+                self.source.commit(events)
+
+                self.events += len(events)
+                self.writes += result.succeeded
+                self.windows += 1
+                print(f"✅ {len(events)} events → {result.succeeded} writes "
+                      f"(total: {self.events:,} events, {self.writes:,} writes)")
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping CDC consumer")
+        finally:
+            self.source.close()
+            self.indexer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mirror Debezium change events into OpenSearch")
+    parser.add_argument("--file", help="Replay change events from a JSON-lines file instead of Kafka")
+    parser.add_argument("--window-ms", type=int, default=int(WINDOW_SECONDS * 1000),
+                        help=f"Coalescing window in milliseconds (default: {int(WINDOW_SECONDS * 1000)})")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_EVENTS,
+                        help=f"Maximum events per window (default: {MAX_BATCH_EVENTS})")
+    args = parser.parse_args(argv)
+
+    source = FileEventSource(args.file) if args.file else KafkaEventSource()
+    consumer = CdcConsumer(source, window=args.window_ms / 1000, max_batch=args.max_batch)
+    print(f"🕒 MySQL timestamps in {consumer.time_zone}")
+    consumer.run(stop_when_idle=bool(args.file))
+
+
+if __name__ == "__main__":
+    main()
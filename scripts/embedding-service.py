@@ -4,25 +4,809 @@ Provides text-to-vector embeddings using sentence-transformers
 
 Model: all-MiniLM-L6-v2 (384 dimensions, fast, lightweight)
 Port: 3101
+
+Backends (EMBED_BACKEND): torch (PyTorch), onnx (ONNX Runtime fp32) or
+onnx-int8 (ONNX Runtime, dynamically quantized). The ONNX models are
+exported at image build time with --export-onnx.
+
+/embed answers in JSON by default; bulk callers can ask for packed
+little-endian arrays through the Accept header (see EMBED_MEDIA_TYPES).
+
+The model loads in the background after startup and is warmed up across
+the length buckets; /ready turns 200 only then, while /health answers
+from the first second.
+
+With EMBED_WORKERS > 1, inference runs in that many worker processes
+instead of threads. Workers map the model's safetensors weights read-only,
+so the weights sit in memory once rather than once per worker. Worker mode
+always uses the torch backend: ONNX Runtime sessions can't share weights
+across processes.
 """
 
-from sentence_transformers import SentenceTransformer
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List
+from contextlib import asynccontextmanager
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+import numpy as np
+import argparse
+import asyncio
+import base64
+import json
+import mmap
+import multiprocessing
+import queue
+import struct
+import threading
 import uvicorn
 import logging
+import os
+import time
+import warnings
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+try:
+    import msgpack
+except ImportError:  # Only needed for Accept: application/msgpack
+    msgpack = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Micro-batching: concurrent /embed requests are collected for up to
+# BATCH_MAX_WAIT_MS (or until BATCH_MAX_SIZE texts) and encoded together
+BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+
+# Inference runs on a bounded thread pool so the event loop stays free for
+# /health and /metrics. Defaults to the physical core count (logical / 2).
+# Each concurrent encode gets an equal share of the cores for torch's
+# intra-op pool, so the threads don't oversubscribe the CPU.
+INFERENCE_THREADS = int(os.getenv("EMBED_INFERENCE_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))
+TORCH_THREADS = max(1, (os.cpu_count() or 2) // INFERENCE_THREADS)
+
+# Worker mode: EMBED_WORKERS > 1 encodes in that many processes, each
+# limited to EMBED_WORKER_THREADS intra-op threads (default: the physical
+# cores split evenly). Workers run the torch backend whatever EMBED_BACKEND
+# says and replace their weights with read-only views of a memory-mapped
+# safetensors file (EMBED_WEIGHTS_FILE, default the model's
+# model.safetensors in the Hugging Face cache), so all workers share the
+# same physical pages. A batch waits up to WORKER_WAIT_SECONDS at a time
+# for a free worker, re-checking that any are still alive.
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+WORKER_THREADS = int(os.getenv("EMBED_WORKER_THREADS", str(max(1, INFERENCE_THREADS // max(1, EMBED_WORKERS)))))
+WEIGHTS_FILE = os.getenv("EMBED_WEIGHTS_FILE", "")
+WORKER_WAIT_SECONDS = 1.0
+SAFETENSORS_DTYPES = {"F32": "float32", "F16": "float16", "BF16": "bfloat16", "I64": "int64", "I32": "int32"}
+
+# Length bucketing: each batch is tokenized first and encoded in groups of
+# similar token length (bucket upper bounds below), so a two-token item name
+# isn't padded to the longest description it was batched with. Groups are
+# split so no forward pass exceeds BUCKET_TOKEN_BUDGET padded tokens.
+# An empty EMBED_LENGTH_BUCKETS encodes every batch in one call.
+LENGTH_BUCKETS = [int(b) for b in os.getenv("EMBED_LENGTH_BUCKETS", "16,32,64,128,256").split(",") if b.strip()]
+BUCKET_TOKEN_BUDGET = int(os.getenv("EMBED_BUCKET_TOKEN_BUDGET", "8192"))
+
+# Warm-up batch sizes run for every length bucket before /ready reports ready
+WARMUP_BATCH_SIZES = [1, BATCH_MAX_SIZE]
+
+# Admission control: reject with 503 once this many requests are waiting
+MAX_QUEUE_DEPTH = int(os.getenv("EMBED_MAX_QUEUE_DEPTH", "256"))
+RETRY_AFTER_SECONDS = int(os.getenv("EMBED_RETRY_AFTER_SECONDS", "1"))
+
+# Query embedding cache (LRU with TTL, bounded by memory). 0 MB disables it.
+# Requests with more than CACHE_MAX_TEXTS texts, or "cache": false, bypass
+# it, so bulk catalog embedding doesn't evict the hot search queries.
+CACHE_MAX_MB = float(os.getenv("EMBED_CACHE_MAX_MB", "64"))
+CACHE_TTL_SECONDS = float(os.getenv("EMBED_CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_TEXTS = int(os.getenv("EMBED_CACHE_MAX_TEXTS", "16"))
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# /embed response encodings by Accept media type: raw little-endian arrays
+# (count x dimensions, row-major) or a msgpack envelope. Anything else gets
+# JSON, where "encoding_format": "base64" packs each request's vectors into
+# one base64 string. Non-JSON responses carry X-Embedding-Count,
+# X-Embedding-Dimensions and X-Embedding-Dtype headers.
+MEDIA_MSGPACK = "application/msgpack"
+EMBED_MEDIA_TYPES = {
+    "application/x-float32": "float32",
+    "application/octet-stream": "float32",
+    "application/x-float16": "float16",
+    MEDIA_MSGPACK: None,  # dtype from the request
+    "application/x-msgpack": None
+}
+DTYPES = {"float32": "<f4", "float16": "<f2"}
+ENCODING_FORMATS = ["float", "base64"]
+
+# Inference backend. ONNX backends load from EMBED_ONNX_DIR and must pass a
+# self-check against PyTorch reference vectors at startup, or the service
+# falls back to torch.
+BACKENDS = ["torch", "onnx", "onnx-int8"]
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("EMBED_ONNX_DIR", f"/app/models/{MODEL_NAME}-onnx")
+ONNX_QUANTIZATION = os.getenv("EMBED_ONNX_QUANTIZATION", "avx2")  # avx2, avx512, avx512_vnni or arm64
+SELF_CHECK_MIN_COSINE = float(os.getenv("EMBED_SELF_CHECK_MIN_COSINE", "0.98"))
+PROBE_REFERENCE_FILE = "probe_reference.npy"
+
+# Fixed probe set for the backend self-check: short queries and long catalog texts
+PROBE_TEXTS = [
+    "tea",
+    "paneer butter masala",
+    "healthy breakfast",
+    "chocolate truffle cake 1 kg",
+    "veg biryani family pack",
+    "amul taaza toned milk 500 ml",
+    "Margherita Pizza Pizza Classic hand-tossed pizza with tomato sauce, mozzarella and fresh basil",
+    "Masala Dosa South Indian Crispy rice and lentil crepe filled with spiced potato, served with "
+    "coconut chutney and sambar. A breakfast favourite, made fresh to order on a cast iron tawa.",
+    "Fresh Farm Eggs Grocery Pack of 12 free range brown eggs from local farms near Nashik",
+    "gulab jamun",
+    "Cold Coffee Beverages Chilled coffee blended with milk, sugar and ice cream",
+    "dal tadka with jeera rice combo"
+]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent embedding requests into a single model.encode call.
+
+    Each request is queued with a future; a dispatcher task drains the
+    queue, encodes all pending texts at once on the inference thread pool
+    and fans the vectors back out. Requests larger than BATCH_MAX_SIZE are
+    encoded on their own. While every inference thread is busy the queue
+    keeps filling, so batches grow with load.
+
+    `encode` runs on the inference threads: encode_batch() in-process, or
+    WorkerPool.encode(), which hands the batch to a worker process.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, threads: int, max_queue_depth: int,
+                 encode: Callable[[List[str]], Tuple[np.ndarray, int, int, int]]):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.threads = threads
+        self.encode = encode
+        self.max_queue_depth = max_queue_depth
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.executor: ThreadPoolExecutor = None
+        self.slots: asyncio.Semaphore = None
+        self.worker: asyncio.Task = None
+        self.carry = None
+        self.tasks = set()
+        self.in_flight = 0
+        # Metrics
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.rejected = 0
+        self.batch_size_counts: Counter = Counter()
+        self.tokens = 0
+        self.padding_tokens = 0
+        self.forward_passes = 0
+
+    def start(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="encode")
+        self.slots = asyncio.Semaphore(self.threads)
+        self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def saturated(self) -> bool:
+        """True when the waiting queue is past the admission threshold"""
+        return self.queue.qsize() >= self.max_queue_depth
+
+    async def submit(self, texts: List[str], normalize: bool) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, normalize, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[List[str], bool, asyncio.Future]]:
+        """Wait for the first request, then gather more until the window closes or the batch is full"""
+        if self.carry is not None:
+            first, self.carry = self.carry, None
+        else:
+            first = await self.queue.get()
+        pending = [first]
+        size = len(first[0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        
+        while size < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if size + len(item[0]) > self.max_batch_size:
+                # Doesn't fit - it starts the next batch instead
+                self.carry = item
+                break
+            pending.append(item)
+            size += len(item[0])
+        
+        return pending
+
+    async def _run(self):
+        while True:
+            # Only start collecting once an inference thread is free
+            await self.slots.acquire()
+            try:
+                pending = await self._collect()
+            except BaseException:
+                self.slots.release()
+                raise
+            task = asyncio.create_task(self._dispatch(pending))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _dispatch(self, pending: List[Tuple[List[str], bool, asyncio.Future]]):
+        texts = [text for request_texts, _, _ in pending for text in request_texts]
+        
+        self.batches += 1
+        self.requests += len(pending)
+        self.texts += len(texts)
+        self.batch_size_counts[len(texts)] += 1
+        self.in_flight += 1
+        
+        try:
+            embeddings, tokens, padding, passes = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.encode, texts
+            )
+        except Exception as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.in_flight -= 1
+            self.slots.release()
+        
+        self.tokens += tokens
+        self.padding_tokens += padding
+        self.forward_passes += passes
+        offset = 0
+        for request_texts, normalize, future in pending:
+            vectors = embeddings[offset:offset + len(request_texts)]
+            offset += len(request_texts)
+            if normalize:
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                vectors = vectors / np.clip(norms, 1e-12, None)
+            if not future.done():
+                future.set_result(vectors)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "rejected": self.rejected,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0,
+            "batch_size_histogram": dict(sorted(self.batch_size_counts.items())),
+            "length_buckets": LENGTH_BUCKETS,
+            "forward_passes": self.forward_passes,
+            "tokens": self.tokens,
+            "padding_tokens": self.padding_tokens,
+            "padding_ratio": round(self.padding_tokens / (self.tokens + self.padding_tokens), 4)
+                             if self.tokens else 0,
+            "queue_depth": self.queue.qsize(),
+            "in_flight_batches": self.in_flight,
+            "inference_threads": self.threads,
+            "max_queue_depth": self.max_queue_depth,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
+
+
+def encode_batch(texts: List[str]) -> Tuple[np.ndarray, int, int, int]:
+    """
+    Runs on an inference thread, or in a worker process with that
+    process's model. Encodes without normalization (that is applied per
+    request afterwards), one length bucket at a time. Returns the vectors
+    and the (tokens, padding tokens, forward passes) it took.
+    """
+    if not LENGTH_BUCKETS:
+        return model.encode(texts, normalize_embeddings=False, show_progress_bar=False), 0, 0, 1
+
+    lengths = [len(ids) for ids in model.tokenizer(
+        texts, truncation=True, max_length=model.max_seq_length
+    )["input_ids"]]
+    embeddings = None
+    padding = 0
+    batches = plan_batches(lengths)
+    for batch in batches:
+        vectors = model.encode(
+            [texts[i] for i in batch],
+            batch_size=len(batch),
+            normalize_embeddings=False,
+            show_progress_bar=False
+        )
+        if embeddings is None:
+            embeddings = np.empty((len(texts), vectors.shape[1]), dtype=vectors.dtype)
+        embeddings[batch] = vectors
+        padding += max(lengths[i] for i in batch) * len(batch) - sum(lengths[i] for i in batch)
+    return embeddings, sum(lengths), padding, len(batches)
+
+
+def plan_batches(lengths: List[int]) -> List[List[int]]:
+    """
+    Group text indices by LENGTH_BUCKETS token-length bucket, shortest first,
+    and split each group so (texts x bucket length) stays within
+    BUCKET_TOKEN_BUDGET. Within a group texts are sorted by length, so each
+    forward pass pads to a near neighbour.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_bucket = None
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        bucket = min(bisect_left(LENGTH_BUCKETS, lengths[i]), len(LENGTH_BUCKETS) - 1)
+        max_texts = max(1, BUCKET_TOKEN_BUDGET // LENGTH_BUCKETS[bucket])
+        if current and (bucket != current_bucket or len(current) >= max_texts):
+            batches.append(current)
+            current = []
+        current.append(i)
+        current_bucket = bucket
+    if current:
+        batches.append(current)
+    return batches
+
+
+class EmbeddingCache:
+    """
+    In-process LRU + TTL cache for embeddings.
+
+    Keys are (model, normalize flag, normalized text). Text is lowercased and
+    whitespace-collapsed, which doesn't change the output of the uncased
+    MiniLM tokenizer. Size is bounded by an approximate memory budget; the
+    least recently used entries are evicted first. Only touched from the
+    event loop, so no locking is needed.
+    """
+
+    # Rough per-entry overhead of the key tuple, OrderedDict node and array header
+    ENTRY_OVERHEAD_BYTES = 200
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.entries: OrderedDict = OrderedDict()
+        self.bytes = 0
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bypassed = 0  # Requests that skipped the cache (bulk or opted out)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(text: str, normalize: bool) -> tuple:
+        return (MODEL_NAME, normalize, " ".join(text.split()).lower())
+
+    def _entry_size(self, key: tuple, vector: np.ndarray) -> int:
+        return vector.nbytes + len(key[2]) + self.ENTRY_OVERHEAD_BYTES
+
+    def get(self, key: tuple) -> Optional[np.ndarray]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, vector = entry
+        if self.ttl > 0 and expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, key: tuple, vector: np.ndarray):
+        if not self.enabled:
+            return
+        if key in self.entries:
+            self._remove(key)
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        self.entries[key] = (time.monotonic() + self.ttl, vector)
+        self.bytes += self._entry_size(key, vector)
+        while self.bytes > self.max_bytes and self.entries:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: tuple):
+        _, vector = self.entries.pop(key)
+        self.bytes -= self._entry_size(key, vector)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "bypassed_requests": self.bypassed,
+            "max_texts": CACHE_MAX_TEXTS
+        }
+
+
+def check_admission():
+    """Reject with 503 + Retry-After while the batcher queue is past its threshold"""
+    if batcher.saturated():
+        batcher.rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Embedding service overloaded, retry later",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+
+async def embed_with_cache(texts: List[str], normalize: bool, use_cache: bool = True) -> np.ndarray:
+    """Serve cached vectors and send only the distinct misses through the batcher"""
+    if not cache.enabled or not use_cache or len(texts) > CACHE_MAX_TEXTS:
+        if cache.enabled:
+            cache.bypassed += 1
+        check_admission()
+        return await batcher.submit(texts, normalize)
+    
+    vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+    misses = {}  # cache key -> indices of texts waiting for that vector
+    for i, text in enumerate(texts):
+        key = cache.key(text, normalize)
+        if key in misses:
+            misses[key].append(i)
+            continue
+        vector = cache.get(key)
+        if vector is None:
+            misses[key] = [i]
+        else:
+            vectors[i] = vector
+    
+    if misses:
+        check_admission()
+        miss_texts = [texts[indices[0]] for indices in misses.values()]
+        encoded = await batcher.submit(miss_texts, normalize)
+        for (key, indices), vector in zip(misses.items(), encoded):
+            cache.put(key, vector)
+            for i in indices:
+                vectors[i] = vector
+    
+    return np.stack(vectors)
+
+
+class ModelState:
+    """
+    Model lifecycle: loading -> ready (or failed). Written by the startup
+    loader thread, or by the worker pool once every worker has died;
+    /health and /ready only read the precomputed responses.
+    """
+
+    def __init__(self):
+        self.state = "loading"
+        self.backend: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.health = {"ok": True, "ready": False, "model": MODEL_NAME, "dimensions": 384,
+                       "device": None, "backend": None}
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def set_ready(self, report: dict):
+        """`report` as returned by load_locally(); the slowest worker's in worker mode"""
+        self.backend = report["backend"]
+        self.load_seconds = round(report["load_seconds"], 3)
+        self.warmup_seconds = round(report["warmup_seconds"], 3)
+        self.health = {
+            "ok": True,
+            "ready": True,
+            "model": MODEL_NAME,
+            "dimensions": report["dimensions"],
+            "device": report["device"],
+            "backend": report["backend"]
+        }
+        self.state = "ready"
+
+    def set_failed(self, error: str):
+        self.error = error
+        self.health = {**self.health, "ok": False}
+        self.state = "failed"
+
+    def readiness(self) -> dict:
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "backend": self.backend,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error
+        }
+
+
+def warm_up(loaded: "SentenceTransformer"):
+    """Encode synthetic batches at every bucket length, so lazy kernel setup happens before traffic"""
+    for length in LENGTH_BUCKETS or [loaded.max_seq_length]:
+        # One token per word, plus [CLS] and [SEP]
+        text = " ".join(["food"] * max(1, length - 2))
+        for batch_size in WARMUP_BATCH_SIZES:
+            batch_size = max(1, min(batch_size, BUCKET_TOKEN_BUDGET // length))
+            loaded.encode([text] * batch_size, batch_size=batch_size, show_progress_bar=False)
+
+
+def load_locally(backend: str, shared_weights: bool = False) -> Tuple["SentenceTransformer", dict]:
+    """Load and warm up a model in this process; worker processes map `shared_weights`"""
+    started = time.perf_counter()
+    loaded, backend = load_backend(backend)
+    shared_tensors = map_shared_weights(loaded, WEIGHTS_FILE) if shared_weights else 0
+    load_seconds = time.perf_counter() - started
+    logger.info(f"✅ Model loaded in {load_seconds:.1f}s ({backend} backend"
+                f"{f', {shared_tensors} tensors memory-mapped' if shared_tensors else ''})")
+
+    started = time.perf_counter()
+    warm_up(loaded)
+    warmup_seconds = time.perf_counter() - started
+    logger.info(f"🔥 Warm-up done in {warmup_seconds:.1f}s "
+                f"(lengths {LENGTH_BUCKETS or [loaded.max_seq_length]}, batch sizes {WARMUP_BATCH_SIZES})")
+
+    device = getattr(loaded, "device", "cpu")
+    return loaded, {
+        "pid": os.getpid(),
+        "backend": backend,
+        "dimensions": loaded.get_sentence_embedding_dimension(),
+        "device": getattr(device, "type", str(device)),
+        "shared_tensors": shared_tensors,
+        "load_seconds": load_seconds,
+        "warmup_seconds": warmup_seconds
+    }
+
+
+def load_and_warm_up():
+    """Startup loader, runs on a worker thread while the server already answers /health"""
+    global model
+    try:
+        if workers:
+            if EMBED_BACKEND != "torch":
+                logger.warning(f"⚠️  EMBED_WORKERS={workers.size} runs the torch backend, not {EMBED_BACKEND}: "
+                               f"ONNX Runtime sessions can't share weights across processes")
+            logger.info(f"Starting {workers.size} embedding workers: {MODEL_NAME} (torch backend, "
+                        f"{workers.threads} threads each)")
+            reports = workers.start()
+            report = max(reports, key=lambda r: r["load_seconds"] + r["warmup_seconds"])
+        else:
+            import torch
+            torch.set_num_threads(TORCH_THREADS)
+            logger.info(f"Loading embedding model: {MODEL_NAME} ({EMBED_BACKEND} backend, "
+                        f"{INFERENCE_THREADS} inference threads x {TORCH_THREADS} torch threads)")
+            model, report = load_locally(EMBED_BACKEND)
+    except Exception as e:
+        logger.error(f"❌ Model load failed: {e}")
+        service.set_failed(str(e))
+        if workers:
+            workers.stop()
+        return
+
+    service.set_ready(report)
+    logger.info("✅ Ready to serve")
+
+
+def worker_main(conn, threads: int):
+    """
+    Worker process: load and warm up, report back, then encode every batch
+    that arrives on `conn` until it receives None.
+    """
+    global model
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        model, report = load_locally("torch", shared_weights=True)
+    except Exception as e:
+        conn.send(("failed", str(e)))
+        return
+    conn.send(("ready", report))
+
+    while True:
+        try:
+            texts = conn.recv()
+        except EOFError:  # The service went away
+            return
+        if texts is None:
+            return
+        try:
+            conn.send(("ok", encode_batch(texts)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class WorkersUnavailable(RuntimeError):
+    """A batch couldn't be encoded because its worker died or none are left (503, retryable)"""
+
+
+class WorkerPool:
+    """
+    Inference worker processes behind an in-process dispatcher.
+
+    Each worker has its own pipe and is either idle (in the `idle` queue)
+    or busy with one batch. encode() runs on a batcher inference thread:
+    it takes the next idle worker, sends it the texts and blocks until the
+    vectors come back, so batches go to whichever worker is free. The
+    batcher runs one inference thread per worker.
+    """
+
+    def __init__(self, size: int, threads: int):
+        self.size = size
+        self.threads = threads
+        self.processes = []
+        self.connections = []
+        self.idle: queue.Queue = queue.Queue()
+        self.reports: List[dict] = []
+        self.alive = 0
+        # Metrics; alive and the counters are updated from every inference thread
+        self.lock = threading.Lock()
+        self.batches = [0] * size
+        self.errors = 0
+
+    def start(self) -> List[dict]:
+        """Spawn the workers and wait until every one is warmed up; returns their load reports"""
+        # spawn, not fork: torch's thread pools don't survive a fork
+        context = multiprocessing.get_context("spawn")
+        for i in range(self.size):
+            parent, child = context.Pipe()
+            process = context.Process(target=worker_main, args=(child, self.threads),
+                                      name=f"embed-worker-{i}", daemon=True)
+            process.start()
+            child.close()
+            self.processes.append(process)
+            self.connections.append(parent)
+
+        for i, conn in enumerate(self.connections):
+            try:
+                status, payload = conn.recv()
+            except EOFError:
+                raise RuntimeError(f"worker {i} exited during startup (exit code {self.processes[i].exitcode})")
+            if status != "ready":
+                raise RuntimeError(f"worker {i}: {payload}")
+            self.reports.append(payload)
+        for i in range(self.size):
+            self.idle.put(i)
+        self.alive = self.size
+        return self.reports
+
+    def acquire(self) -> int:
+        """The next idle worker; raises WorkersUnavailable once none are left alive"""
+        while True:
+            if not self.alive:
+                raise WorkersUnavailable("No embedding workers left")
+            try:
+                return self.idle.get(timeout=WORKER_WAIT_SECONDS)
+            except queue.Empty:
+                continue
+
+    def encode(self, texts: List[str]) -> Tuple[np.ndarray, int, int, int]:
+        worker = self.acquire()
+        conn = self.connections[worker]
+        try:
+            conn.send(texts)
+            status, payload = conn.recv()
+        except (EOFError, OSError):
+            # Crashed: it stays out of the idle queue; with none left the service reports failed
+            with self.lock:
+                self.alive -= 1
+                self.errors += 1
+                alive = self.alive
+            logger.error(f"❌ Embedding worker {worker} died (exit code {self.processes[worker].exitcode}), "
+                         f"{alive} left")
+            if not alive:
+                service.set_failed("All embedding workers exited")
+            raise WorkersUnavailable(f"Embedding worker {worker} died")
+        with self.lock:
+            if status == "ok":
+                self.batches[worker] += 1
+            else:
+                self.errors += 1
+        self.idle.put(worker)
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def stop(self):
+        for conn in self.connections:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    def stats(self) -> dict:
+        with self.lock:
+            alive, errors, batches = self.alive, self.errors, list(self.batches)
+        return {
+            "workers": self.size,
+            "alive": alive,
+            "threads_per_worker": self.threads,
+            "errors": errors,
+            "per_worker": [
+                {"pid": process.pid, "batches": batches[i], **process_memory(process.pid)}
+                for i, process in enumerate(self.processes)
+            ]
+        }
+
+
+def process_memory(pid: Optional[int]) -> dict:
+    """
+    RSS and PSS in MB from /proc (Linux only, empty elsewhere). PSS splits
+    shared pages between the processes mapping them, so memory-mapped
+    weights count once across all workers.
+    """
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                field, value = line.split(":", 1)
+                if field in ("Rss", "Pss", "Shared_Clean"):
+                    memory[f"{field.lower()}_mb"] = round(int(value.split()[0]) / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    return memory
+
+
+model: Optional["SentenceTransformer"] = None
+service = ModelState()
+cache = EmbeddingCache(int(CACHE_MAX_MB * 1024 * 1024), CACHE_TTL_SECONDS)
+workers: Optional[WorkerPool] = WorkerPool(EMBED_WORKERS, WORKER_THREADS) if EMBED_WORKERS > 1 else None
+batcher = MicroBatcher(BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, workers.size if workers else INFERENCE_THREADS,
+                       MAX_QUEUE_DEPTH, workers.encode if workers else encode_batch)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    batcher.start()
+    logger.info(f"✅ Micro-batcher started (max_batch_size={BATCH_MAX_SIZE}, max_wait_ms={BATCH_MAX_WAIT_MS}, "
+                f"inference_threads={batcher.threads}, max_queue_depth={MAX_QUEUE_DEPTH})")
+    # Load in the background: /health answers right away, /ready once warmed up
+    asyncio.get_running_loop().run_in_executor(None, load_and_warm_up)
+    yield
+    await batcher.stop()
+    if workers:
+        workers.stop()
+
+
 # Initialize FastAPI
 app = FastAPI(
     title="Mangwale Embedding Service",
     description="Text-to-vector embeddings for semantic search",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -34,15 +818,115 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load embedding model
-logger.info("Loading embedding model: all-MiniLM-L6-v2")
-model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-logger.info("✅ Model loaded successfully")
+def onnx_file(backend: str) -> str:
+    return "onnx/model.onnx" if backend == "onnx" else f"onnx/model_qint8_{ONNX_QUANTIZATION}.onnx"
+
+
+def load_model(backend: str) -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(f"sentence-transformers/{MODEL_NAME}")
+    return SentenceTransformer(ONNX_MODEL_DIR, backend="onnx", model_kwargs={"file_name": onnx_file(backend)})
+
+
+def self_check(candidate: "SentenceTransformer") -> float:
+    """Lowest cosine similarity between the candidate's and PyTorch's vectors for PROBE_TEXTS"""
+    reference = np.load(os.path.join(ONNX_MODEL_DIR, PROBE_REFERENCE_FILE))
+    vectors = candidate.encode(PROBE_TEXTS, normalize_embeddings=True, show_progress_bar=False)
+    return float(np.min(np.sum(vectors * reference, axis=1)))
+
+
+def load_backend(backend: str) -> Tuple["SentenceTransformer", str]:
+    """Load the requested backend, falling back to torch if it is missing or fails the self-check"""
+    if backend not in BACKENDS:
+        raise ValueError(f"EMBED_BACKEND must be one of {', '.join(BACKENDS)}, got '{backend}'")
+    if backend != "torch":
+        try:
+            candidate = load_model(backend)
+            cosine = self_check(candidate)
+        except Exception as e:
+            logger.error(f"❌ {backend} backend unavailable ({e}), falling back to torch")
+        else:
+            if cosine >= SELF_CHECK_MIN_COSINE:
+                logger.info(f"✅ {backend} self-check passed: min cosine {cosine:.4f} vs PyTorch "
+                            f"on {len(PROBE_TEXTS)} probes")
+                return candidate, backend
+            logger.error(f"❌ {backend} self-check failed: min cosine {cosine:.4f} < {SELF_CHECK_MIN_COSINE}, "
+                         f"falling back to torch")
+    return load_model("torch"), "torch"
+
+
+def map_shared_weights(loaded: "SentenceTransformer", weights_file: str = "") -> int:
+    """
+    Swap the transformer's parameters for read-only tensors viewing a
+    memory map of a safetensors file. The loaded copies are freed; what is
+    left lives in the page cache, shared by every worker mapping the same
+    file. Tensors whose name, shape or dtype doesn't match stay private.
+    Returns the number of tensors mapped. Needs torch>=2.1 (assign=True).
+    """
+    import torch
+
+    if not weights_file:
+        from huggingface_hub import hf_hub_download
+        weights_file = hf_hub_download(f"sentence-transformers/{MODEL_NAME}", "model.safetensors")
+
+    with open(weights_file, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # Layout: u64 little-endian header size, JSON header, then the raw tensor data
+    header_size = struct.unpack("<Q", mapped[:8])[0]
+    header = json.loads(mapped[8:8 + header_size])
+    data_start = 8 + header_size
+
+    transformer = loaded[0].auto_model
+    expected = transformer.state_dict()
+    state = {}
+    with warnings.catch_warnings():
+        # torch warns that the buffer isn't writable; inference never writes parameters
+        warnings.simplefilter("ignore", UserWarning)
+        for name, entry in header.items():
+            if name == "__metadata__" or entry["dtype"] not in SAFETENSORS_DTYPES:
+                continue
+            # Checkpoints may prefix names with the architecture ("bert.embeddings...")
+            key = name if name in expected else name.split(".", 1)[-1]
+            dtype = getattr(torch, SAFETENSORS_DTYPES[entry["dtype"]])
+            begin, end = entry["data_offsets"]
+            if key not in expected or expected[key].dtype != dtype or end == begin:
+                continue
+            tensor = torch.frombuffer(mapped, dtype=dtype, count=(end - begin) // dtype.itemsize,
+                                      offset=data_start + begin).reshape(entry["shape"])
+            if tensor.shape == expected[key].shape:
+                state[key] = tensor
+    if not state:
+        raise RuntimeError(f"No tensors in {weights_file} match {MODEL_NAME}")
+
+    transformer.load_state_dict(state, strict=False, assign=True)
+    transformer.shared_weights_map = mapped  # Keep the mapping open as long as the model
+    return len(state)
+
+
+def export_onnx(path: str):
+    """
+    Build step: write the fp32 ONNX model, its int8 dynamically quantized
+    variant and the PyTorch reference vectors for the self-check to `path`.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    reference = load_model("torch").encode(PROBE_TEXTS, normalize_embeddings=True, show_progress_bar=False)
+    onnx_model = SentenceTransformer(f"sentence-transformers/{MODEL_NAME}", backend="onnx")
+    onnx_model.save_pretrained(path)
+    export_dynamic_quantized_onnx_model(onnx_model, ONNX_QUANTIZATION, path)
+    np.save(os.path.join(path, PROBE_REFERENCE_FILE), reference)
+    logger.info(f"✅ Exported ONNX models ({onnx_file('onnx')}, {onnx_file('onnx-int8')}) to {path}")
+
 
 # Request/Response models
 class EmbedRequest(BaseModel):
     texts: List[str]
     normalize: bool = True
+    encoding_format: str = "float"  # JSON responses only: float or base64
+    dtype: str = "float32"  # base64 and msgpack responses: float32 or float16
+    cache: bool = True  # false for bulk/pipeline calls, so they don't evict cached queries
 
 class EmbedResponse(BaseModel):
     embeddings: List[List[float]]
@@ -52,13 +936,59 @@ class EmbedResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     ok: bool
+    ready: bool
     model: str
     dimensions: int
-    device: str
+    device: Optional[str]
+    backend: Optional[str]
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """The first media type in the Accept header that EMBED_MEDIA_TYPES offers, or None for JSON"""
+    for media_range in (accept or "").split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if media_type in EMBED_MEDIA_TYPES:
+            return media_type
+        if media_type in ("application/json", "*/*"):
+            return None
+    return None
+
+
+def encoded_response(embeddings: np.ndarray, media_type: Optional[str], request: EmbedRequest) -> Response:
+    """Packed-array response for a negotiated media type or base64 JSON"""
+    dtype = (EMBED_MEDIA_TYPES.get(media_type) if media_type else None) or request.dtype
+    count, dimensions = embeddings.shape
+    packed = np.ascontiguousarray(embeddings, dtype=DTYPES[dtype]).tobytes()
+    headers = {
+        "X-Embedding-Count": str(count),
+        "X-Embedding-Dimensions": str(dimensions),
+        "X-Embedding-Dtype": dtype,
+        "X-Embedding-Model": MODEL_NAME
+    }
+
+    if media_type is None:
+        return JSONResponse({
+            "embeddings": base64.b64encode(packed).decode("ascii"),
+            "encoding_format": "base64",
+            "dtype": dtype,
+            "dimensions": dimensions,
+            "model": MODEL_NAME,
+            "count": count
+        }, headers=headers)
+    if EMBED_MEDIA_TYPES[media_type] is None:
+        body = msgpack.packb({
+            "embeddings": packed,
+            "dtype": dtype,
+            "dimensions": dimensions,
+            "model": MODEL_NAME,
+            "count": count
+        })
+        return Response(body, media_type=media_type, headers=headers)
+    return Response(packed, media_type=media_type, headers=headers)
+
 
 # Endpoints
 @app.post("/embed", response_model=EmbedResponse)
-async def embed_texts(request: EmbedRequest):
+async def embed_texts(request: EmbedRequest, accept: Optional[str] = Header(None)):
     """
     Generate embeddings for a list of texts
     
@@ -67,6 +997,9 @@ async def embed_texts(request: EmbedRequest):
         {
             "texts": ["pizza margherita", "healthy breakfast"]
         }
+
+    With "Accept: application/x-float32" the body is count x dimensions
+    little-endian float32 values instead of JSON.
     """
     try:
         if not request.texts:
@@ -74,15 +1007,32 @@ async def embed_texts(request: EmbedRequest):
         
         if len(request.texts) > 1000:
             raise HTTPException(status_code=400, detail="Maximum 1000 texts per request")
+
+        if request.encoding_format not in ENCODING_FORMATS:
+            raise HTTPException(status_code=400, detail=f"encoding_format must be one of {', '.join(ENCODING_FORMATS)}")
+
+        if request.dtype not in DTYPES:
+            raise HTTPException(status_code=400, detail=f"dtype must be one of {', '.join(DTYPES)}")
+
+        if not service.ready:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Model is {service.state}, retry later",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+            )
+
+        media_type = negotiate(accept)
+        if media_type and EMBED_MEDIA_TYPES[media_type] is None and msgpack is None:
+            raise HTTPException(status_code=406, detail="msgpack responses need the msgpack package")
         
         logger.info(f"Embedding {len(request.texts)} texts")
         
-        # Generate embeddings
-        embeddings = model.encode(
-            request.texts,
-            normalize_embeddings=request.normalize,
-            show_progress_bar=False
-        )
+        # Generate embeddings (cache first, misses batched with concurrent requests)
+        embeddings = await embed_with_cache(request.texts, request.normalize, request.cache)
+
+        if media_type or request.encoding_format == "base64":
+            logger.info(f"✅ Generated {len(embeddings)} embeddings ({media_type or 'base64'})")
+            return encoded_response(embeddings, media_type, request)
         
         # Convert to list
         embeddings_list = embeddings.tolist()
@@ -92,25 +1042,39 @@ async def embed_texts(request: EmbedRequest):
         return {
             "embeddings": embeddings_list,
             "dimensions": len(embeddings_list[0]) if embeddings_list else 0,
-            "model": "all-MiniLM-L6-v2",
+            "model": MODEL_NAME,
             "count": len(embeddings_list)
         }
         
+    except HTTPException:
+        raise
+    except WorkersUnavailable as e:
+        logger.error(f"❌ Embedding error: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Embedding failed: {str(e)}, retry later",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
     except Exception as e:
         logger.error(f"❌ Embedding error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Embedding failed: {str(e)}")
 
 @app.get("/health", response_model=HealthResponse)
 async def health():
-    """Health check endpoint"""
-    import torch
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    
+    """Liveness: precomputed, answers while the model is still loading (503 only if loading failed)"""
+    if not service.health["ok"]:
+        return JSONResponse(service.health, status_code=503)
+    return service.health
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 only once the model is loaded and warmed up"""
+    return JSONResponse(service.readiness(), status_code=200 if service.ready else 503)
+
+@app.get("/metrics")
+async def metrics():
+    """Micro-batching, cache and (in worker mode) per-worker metrics"""
     return {
-        "ok": True,
-        "model": "all-MiniLM-L6-v2",
-        "dimensions": 384,
-        "device": device
+        "batching": batcher.stats(),
+        "cache": cache.stats(),
+        "workers": workers.stats() if workers else None
     }
 
 @app.get("/")
@@ -118,15 +1082,26 @@ async def root():
     """Root endpoint with service info"""
     return {
         "service": "Mangwale Embedding Service",
-        "model": "all-MiniLM-L6-v2",
+        "model": MODEL_NAME,
         "dimensions": 384,
+        "backend": service.backend,
         "endpoints": {
             "embed": "POST /embed",
-            "health": "GET /health"
+            "health": "GET /health",
+            "ready": "GET /ready",
+            "metrics": "GET /metrics"
         }
     }
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mangwale Embedding Service")
+    parser.add_argument("--export-onnx", metavar="DIR", default=None,
+                        help="Export the ONNX fp32/int8 models and self-check reference to DIR and exit")
+    args = parser.parse_args()
+    if args.export_onnx:
+        export_onnx(args.export_onnx)
+        raise SystemExit(0)
+
     logger.info("🚀 Starting Embedding Service on port 3101")
     uvicorn.run(
         app,
@@ -0,0 +1,93 @@
+"""
+Persistent on-disk embedding store for Mangwale Search indexing jobs.
+
+Vectors are kept in a local SQLite file keyed by sha256(model + text), so
+reruns of generate-embeddings.py only call the embedding service for texts
+that are new or have changed since the last run.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Iterable, List
+
+from job_state import STATE_DIR
+
+DEFAULT_STORE_PATH = os.path.join(STATE_DIR, "embeddings.sqlite3")
+
+# SQLite's default limit on host parameters per statement is 999
+LOOKUP_CHUNK = 500
+
+
+class EmbeddingStore:
+    """SQLite-backed map of (model, text) -> float32 vector"""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, model: str = "all-MiniLM-L6-v2"):
+        self.path = path
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                dims INTEGER NOT NULL,
+                vector BLOB NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model}\n{text}".encode("utf-8")).digest()
+
+    def get_many(self, texts: Iterable[str]) -> Dict[str, List[float]]:
+        """Return the stored vectors for whichever of the texts are present"""
+        keys = {self.key(text): text for text in set(texts)}
+        found = {}
+        key_list = list(keys)
+
+        with self.lock:
+            for i in range(0, len(key_list), LOOKUP_CHUNK):
+                chunk = key_list[i:i + LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                )
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[keys[key]] = vector.tolist()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        """Store vectors for the given texts, replacing any previous value"""
+        rows = [
+            (self.key(text), len(vector), array("f", vector).tobytes())
+            for text, vector in vectors.items()
+        ]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dims, vector) VALUES (?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
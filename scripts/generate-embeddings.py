@@ -5,92 +5,298 @@ Processes documents in batches for efficient memory usage.
 """
 
 import requests
-import json
 import argparse
+import queue
+import sys
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+
+from bulk_indexer import BulkIndexer
+from embedding_store import EmbeddingStore, DEFAULT_STORE_PATH
+from job_state import load_state, save_state, state_path
 
 # Configuration
 OPENSEARCH_URL = "http://localhost:9200"
 EMBEDDING_SERVICE_URL = "http://localhost:3101"
-BATCH_SIZE = 100  # Process 100 documents at a time
-MAX_EMBEDDING_BATCH = 50  # Embedding service processes 50 texts at once
+BATCH_SIZE = 100  # Documents read per page; bulk requests are split by payload size
+MAX_EMBEDDING_BATCH = 1000  # Embedding service accepts up to 1000 texts per request
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+SOURCE_FIELDS = ["id", "name", "description", "category_name", "price",
+                 "veg", "avg_rating", "rating_count", "store_name",
+                 "store_location", "module_id", "brand", "discount",
+                 "image", "images", "delivery_time", "order_count",
+                 "created_at", "available_time_starts", "available_time_ends"]
+
+# Pipeline: slice readers -> embedding workers -> bulk writers, connected by
+# bounded queues so OpenSearch reads, inference and indexing overlap
+READ_SLICES = 4  # Concurrent point-in-time slices read from the source index
+PIT_KEEP_ALIVE = "5m"
+# `id` with `_id` as a unique tiebreaker: documents sharing (or missing) an `id` are
+# neither skipped nor repeated across pages. Both survive a new point-in-time, so a
+# checkpointed sort key stays valid on resume (_shard_doc would not).
+READ_SORT = [{"id": "asc"}, {"_id": "asc"}]
+EMBEDDING_WORKERS = 4
+BULK_WRITERS = 2
+QUEUE_DEPTH = 8  # Batches buffered between stages
+EMBED_RETRIES = 3  # Retries when the embedding service answers 503
+CHECKPOINT_INTERVAL = 5.0  # Seconds between checkpoint writes
+
+# Marks the end of a queue's input
+_DONE = object()
+
+
+class StageStats:
+    """Thread-safe document counter for one pipeline stage"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.docs = 0
+        self.lock = threading.Lock()
+    
+    def add(self, docs: int):
+        with self.lock:
+            self.docs += docs
+    
+    def rate(self, elapsed: float) -> float:
+        return self.docs / elapsed if elapsed > 0 else 0
 
 class EmbeddingGenerator:
-    def __init__(self, source_index: str, target_index: str):
+    def __init__(self, source_index: str, target_index: str, store: Optional[EmbeddingStore] = None,
+                 slices: int = READ_SLICES, embedding_workers: int = EMBEDDING_WORKERS,
+                 bulk_writers: int = BULK_WRITERS, queue_depth: int = QUEUE_DEPTH,
+                 checkpoint_path: Optional[str] = None, resume: bool = False):
         self.source_index = source_index
         self.target_index = target_index
+        self.store = store
+        self.slices = slices
+        self.embedding_workers = embedding_workers
+        self.bulk_writers = bulk_writers
+        self.indexer = BulkIndexer(OPENSEARCH_URL, verbose=False)
         self.processed_count = 0
         self.error_count = 0
+        self.batch_num = 0
         self.start_time = time.time()
+        self.lock = threading.Lock()
+        
+        # Checkpointing: per slice, the sort key up to which every batch has been
+        # indexed (or recorded as failed). Batches finish out of order, so completed
+        # batches wait in done_batches until all earlier ones of their slice are done.
+        self.checkpoint_path = checkpoint_path
+        self.last_checkpoint = 0.0
+        self.committed: Dict[int, Optional[list]] = {}
+        self.read_seq: Dict[int, int] = {}
+        self.next_commit: Dict[int, int] = {}
+        self.done_batches: Dict[int, Dict[int, list]] = {}
+        self.readers_finished = set()
+        self.exhausted_slices = set()
+        self.failed_ids = set()
+        # IDs that failed in the previous run and haven't been retried yet
+        self.retry_ids = set()
+        self.retry_batches: Dict[int, List[str]] = {}
+        self.elapsed_before = 0.0
+        if resume:
+            self.load_checkpoint()
+        
+        self.embed_queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self.bulk_queue: queue.Queue = queue.Queue(maxsize=queue_depth)
+        self.read_stats = StageStats("read")
+        self.embed_stats = StageStats("embed")
+        self.bulk_stats = StageStats("bulk")
+    
+    def add_errors(self, count: int):
+        with self.lock:
+            self.error_count += count
+    
+    def load_checkpoint(self):
+        """Restore slice positions, counts and failed IDs from the checkpoint file"""
+        state = load_state(self.checkpoint_path)
+        if state is None:
+            print(f"⚠️  No checkpoint at {self.checkpoint_path}, starting from the beginning")
+            return
+        if state.get("source_index") != self.source_index or state.get("target_index") != self.target_index:
+            raise ValueError(f"Checkpoint {self.checkpoint_path} is for "
+                             f"{state.get('source_index')} → {state.get('target_index')}")
+        
+        # Slice assignment depends on the slice count, so keep the original one
+        self.slices = state["slices"]
+        # Keys saved before the _id tiebreaker get the lowest _id: a few documents are reread
+        self.committed = {int(k): v + [""] * (len(READ_SORT) - len(v)) if v else v
+                          for k, v in state.get("committed", {}).items()}
+        self.exhausted_slices = set(state.get("exhausted_slices", []))
+        self.retry_ids = set(state.get("failed_ids", []))
+        self.processed_count = state.get("processed_count", 0)
+        self.elapsed_before = state.get("elapsed_seconds", 0.0)
+        
+        print(f"♻️  Resuming from {self.checkpoint_path}: {self.processed_count:,} docs already indexed, "
+              f"{len(self.exhausted_slices)}/{self.slices} slices complete, "
+              f"{len(self.retry_ids):,} failed IDs to retry")
+    
+    def elapsed(self) -> float:
+        """Seconds spent on the job, including runs before a resume"""
+        return self.elapsed_before + time.time() - self.start_time
+    
+    def save_checkpoint(self, force: bool = False):
+        """Write the checkpoint file. Callers hold self.lock."""
+        if self.checkpoint_path is None:
+            return
+        now = time.time()
+        if not force and now - self.last_checkpoint < CHECKPOINT_INTERVAL:
+            return
+        self.last_checkpoint = now
+        
+        elapsed = self.elapsed()
+        save_state(self.checkpoint_path, {
+            "source_index": self.source_index,
+            "target_index": self.target_index,
+            "slices": self.slices,
+            "committed": self.committed,
+            "exhausted_slices": sorted(self.exhausted_slices),
+            "failed_ids": sorted(self.failed_ids | self.retry_ids),
+            "processed_count": self.processed_count,
+            "error_count": self.error_count,
+            "elapsed_seconds": round(elapsed, 1),
+            "docs_per_sec": round(self.processed_count / elapsed, 1) if elapsed > 0 else 0,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        })
+    
+    def complete_batch(self, slice_id: Optional[int], seq: int, sort_key: Optional[list],
+                       failed_ids: List[str]):
+        """Record that a read batch has been fully handled, advancing its slice's checkpoint"""
+        with self.lock:
+            self.failed_ids.update(failed_ids)
+            if slice_id is None:
+                # A batch of retried IDs; failures were re-added above
+                self.retry_ids.difference_update(self.retry_batches.pop(seq, []))
+            else:
+                self.done_batches[slice_id][seq] = sort_key
+                while self.next_commit[slice_id] in self.done_batches[slice_id]:
+                    self.committed[slice_id] = self.done_batches[slice_id].pop(self.next_commit[slice_id])
+                    self.next_commit[slice_id] += 1
+                self.check_slice_exhausted(slice_id)
+            self.save_checkpoint()
+    
+    def check_slice_exhausted(self, slice_id: int):
+        """A slice is complete once its reader finished and every batch it read is committed"""
+        if slice_id in self.readers_finished and self.next_commit[slice_id] == self.read_seq[slice_id]:
+            self.exhausted_slices.add(slice_id)
         
     def get_embedding(self, texts: List[str]) -> Optional[List[List[float]]]:
-        """Get embeddings from embedding service"""
+        """Get embeddings, from the local store where possible and the embedding service otherwise"""
+        if self.store is None:
+            return self.request_embeddings(texts)
+        
+        found = self.store.get_many(texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in found))
+        if missing:
+            vectors = self.request_embeddings(missing)
+            if vectors is None:
+                return None
+            new_vectors = dict(zip(missing, vectors))
+            self.store.put_many(new_vectors)
+            found.update(new_vectors)
+        
+        return [found[text] for text in texts]
+    
+    def request_embeddings(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """Get embeddings from embedding service, backing off while it reports overload"""
         try:
-            response = requests.post(
-                f"{EMBEDDING_SERVICE_URL}/embed",
-                json={"texts": texts},
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()["embeddings"]
+            for attempt in range(EMBED_RETRIES + 1):
+                # Packed little-endian float32 instead of JSON floats: ~4x smaller, no float parsing
+                response = requests.post(
+                    f"{EMBEDDING_SERVICE_URL}/embed",
+                    json={"texts": texts, "cache": False},  # Catalog texts would only evict cached queries
+                    headers={"Accept": "application/x-float32"},
+                    timeout=30
+                )
+                if response.status_code == 503 and attempt < EMBED_RETRIES:
+                    time.sleep(float(response.headers.get("Retry-After", 1)) * (attempt + 1))
+                    continue
+                response.raise_for_status()
+                return self.decode_embeddings(response)
         except Exception as e:
             print(f"❌ Embedding error: {e}")
             return None
     
-    def scroll_documents(self):
-        """Scroll through all documents in source index"""
-        # Initialize scroll
+    @staticmethod
+    def decode_embeddings(response) -> List[List[float]]:
+        """Vectors from a packed float32 /embed response (or a JSON one from an older service)"""
+        if "X-Embedding-Dimensions" not in response.headers:
+            return response.json()["embeddings"]
+        dimensions = int(response.headers["X-Embedding-Dimensions"])
+        values = array("f")
+        values.frombytes(response.content)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return [values[i:i + dimensions].tolist() for i in range(0, len(values), dimensions)]
+    
+    def open_point_in_time(self) -> str:
+        """Open a point-in-time on the source index so all slices read one consistent view"""
         response = requests.post(
-            f"{OPENSEARCH_URL}/{self.source_index}/_search?scroll=5m",
-            json={
-                "size": BATCH_SIZE,
-                "query": {"match_all": {}},
-                "_source": ["id", "name", "description", "category_name", "price", 
-                           "veg", "avg_rating", "rating_count", "store_name", 
-                           "store_location", "module_id", "brand", "discount",
-                           "image", "images", "delivery_time", "order_count",
-                           "created_at", "available_time_starts", "available_time_ends"]
-            },
-            headers={"Content-Type": "application/json"}
+            f"{OPENSEARCH_URL}/{self.source_index}/_search/point_in_time",
+            params={"keep_alive": PIT_KEEP_ALIVE},
+            timeout=30
         )
-        
+        response.raise_for_status()
+        return response.json()["pit_id"]
+    
+    def close_point_in_time(self, pit_id: str):
+        try:
+            requests.delete(
+                f"{OPENSEARCH_URL}/_search/point_in_time",
+                json={"pit_id": [pit_id]},
+                headers={"Content-Type": "application/json"},
+                timeout=30
+            )
+        except Exception as e:
+            print(f"⚠️  Could not close point-in-time: {e}")
+    
+    def count_documents(self) -> int:
+        response = requests.get(f"{OPENSEARCH_URL}/{self.source_index}/_count", timeout=30)
         if response.status_code != 200:
-            print(f"❌ Failed to initialize scroll: {response.text}")
-            return
-        
-        data = response.json()
-        scroll_id = data.get("_scroll_id")
-        hits = data.get("hits", {}).get("hits", [])
-        total_docs = data.get("hits", {}).get("total", {}).get("value", 0)
+            return 0
+        return response.json().get("count", 0)
+    
+    def read_slice(self, pit_id: str, slice_id: int, search_after: Optional[list] = None):
+        """Page through one slice of the point-in-time with search_after.
         
-        print(f"📊 Total documents to process: {total_docs:,}")
-        print("")
+        Slices are assigned on the numeric `id` field and pages are sorted by READ_SORT,
+        so a slice can be resumed from its last sort key after a crash, even with a new
+        point-in-time. Yields (sort key of the last hit, hits) per page.
+        """
+        body = {
+            "size": BATCH_SIZE,
+            "query": {"match_all": {}},
+            "sort": READ_SORT,
+            "_source": SOURCE_FIELDS
+        }
+        if self.slices > 1:
+            body["slice"] = {"field": "id", "id": slice_id, "max": self.slices}
         
-        while hits:
-            yield hits
+        while True:
+            body["pit"] = {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}
+            if search_after is not None:
+                body["search_after"] = search_after
             
-            # Get next batch
             response = requests.post(
-                f"{OPENSEARCH_URL}/_search/scroll",
-                json={"scroll": "5m", "scroll_id": scroll_id},
-                headers={"Content-Type": "application/json"}
+                f"{OPENSEARCH_URL}/_search",
+                json=body,
+                headers={"Content-Type": "application/json"},
+                timeout=60
             )
-            
             if response.status_code != 200:
-                break
-                
+                raise RuntimeError(f"slice {slice_id} search failed: {response.status_code} {response.text[:200]}")
+            
             data = response.json()
-            scroll_id = data.get("_scroll_id")
+            pit_id = data.get("pit_id", pit_id)
             hits = data.get("hits", {}).get("hits", [])
-        
-        # Clean up scroll
-        if scroll_id:
-            requests.delete(
-                f"{OPENSEARCH_URL}/_search/scroll",
-                json={"scroll_id": [scroll_id]},
-                headers={"Content-Type": "application/json"}
-            )
+            if not hits:
+                return
+            
+            search_after = hits[-1]["sort"]
+            yield search_after, hits
     
     def prepare_texts_for_embedding(self, documents: List[Dict]) -> tuple[List[str], List[str], List[str]]:
         """Prepare name, description, and combined texts"""
@@ -120,16 +326,15 @@ class EmbeddingGenerator:
     def bulk_index_with_vectors(self, documents: List[Dict], 
                                 name_vectors: List[List[float]],
                                 desc_vectors: List[List[float]],
-                                combined_vectors: List[List[float]]):
-        """Bulk index documents with vector embeddings"""
-        bulk_body = []
+                                combined_vectors: List[List[float]]) -> List[str]:
+        """Bulk index documents with vector embeddings. Returns the source IDs that failed."""
+        actions = []
+        source_ids = {}  # target _id -> source _id
         
         for doc, name_vec, desc_vec, comb_vec in zip(documents, name_vectors, desc_vectors, combined_vectors):
             source = doc.get("_source", {})
             doc_id = source.get("id")
-            
-            # Index action
-            bulk_body.append(json.dumps({"index": {"_index": self.target_index, "_id": doc_id}}))
+            source_ids[str(doc_id)] = str(doc["_id"])
             
             # Document with vectors
             doc_with_vectors = {**source}
@@ -141,109 +346,218 @@ class EmbeddingGenerator:
             if "veg" in doc_with_vectors and isinstance(doc_with_vectors["veg"], int):
                 doc_with_vectors["veg"] = bool(doc_with_vectors["veg"])
             
-            bulk_body.append(json.dumps(doc_with_vectors))
+            actions.append(({"index": {"_index": self.target_index, "_id": doc_id}}, doc_with_vectors))
         
-        # Send bulk request
-        bulk_data = "\n".join(bulk_body) + "\n"
+        # Send bulk request (split by payload size, rejected items retried with backoff)
+        result = self.indexer.send(actions)
+        if result.failures:
+            # Show first error for debugging
+            print(f"⚠️  Index error: {result.failures[0].error}")
+            self.add_errors(result.failed)
+        with self.lock:
+            self.processed_count += result.succeeded
         
-        try:
-            response = requests.post(
-                f"{OPENSEARCH_URL}/_bulk",
-                data=bulk_data,
-                headers={"Content-Type": "application/x-ndjson"},
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                # Count successful indexing
-                self.processed_count += len(documents)
-                # Count errors if any
-                if result.get("errors"):
-                    error_count = sum(1 for item in result.get("items", []) 
-                                    if item.get("index", {}).get("error"))
-                    self.error_count += error_count
-                    if error_count > 0:
-                        # Show first error for debugging
-                        for item in result.get("items", []):
-                            if item.get("index", {}).get("error"):
-                                print(f"⚠️  Index error: {item['index']['error']}")
-                                break
-            else:
-                print(f"❌ Bulk index failed: {response.status_code}")
-                self.error_count += len(documents)
-                
-        except Exception as e:
-            print(f"❌ Bulk index error: {e}")
-            self.error_count += len(documents)
+        return [source_ids[failure.id] for failure in result.failures]
     
-    def process_batch(self, documents: List[Dict]):
-        """Process a batch of documents: generate embeddings and index"""
+    def process_batch(self, documents: List[Dict]) -> Optional[Tuple[List[Dict], List, List, List]]:
+        """Generate name, description and combined embeddings for a batch of documents.
+        
+        Texts are deduplicated across all three fields and the whole batch (an empty
+        description falls back to the name, for example) and embedded in a single
+        request, then mapped back to each field. Returns the documents with their
+        vectors, or None if the batch could not be embedded.
+        """
         if not documents:
-            return
+            return None
         
         # Prepare texts
         names, descriptions, combined = self.prepare_texts_for_embedding(documents)
+        all_texts = names + descriptions + combined
+        unique_texts = list(dict.fromkeys(all_texts))
         
-        # Generate embeddings in sub-batches to avoid overwhelming the service
-        all_name_vecs = []
-        all_desc_vecs = []
-        all_comb_vecs = []
-        
-        for i in range(0, len(names), MAX_EMBEDDING_BATCH):
-            batch_names = names[i:i+MAX_EMBEDDING_BATCH]
-            batch_descs = descriptions[i:i+MAX_EMBEDDING_BATCH]
-            batch_combs = combined[i:i+MAX_EMBEDDING_BATCH]
-            
-            # Get embeddings
-            name_vecs = self.get_embedding(batch_names)
-            desc_vecs = self.get_embedding(batch_descs)
-            comb_vecs = self.get_embedding(batch_combs)
-            
-            if not (name_vecs and desc_vecs and comb_vecs):
+        vectors = []
+        for i in range(0, len(unique_texts), MAX_EMBEDDING_BATCH):
+            chunk_vectors = self.get_embedding(unique_texts[i:i+MAX_EMBEDDING_BATCH])
+            if not chunk_vectors:
                 print(f"⚠️  Skipping batch due to embedding error")
-                self.error_count += len(batch_names)
-                continue
-            
-            all_name_vecs.extend(name_vecs)
-            all_desc_vecs.extend(desc_vecs)
-            all_comb_vecs.extend(comb_vecs)
-            
-            time.sleep(0.1)  # Small delay to avoid overloading
+                self.add_errors(len(documents))
+                return None
+            vectors.extend(chunk_vectors)
+        
+        dedup_ratio = 1 - len(unique_texts) / len(all_texts)
+        with self.lock:
+            print(f"   ↳ Embedded {len(unique_texts)} unique of {len(all_texts)} texts "
+                  f"({dedup_ratio:.0%} deduplicated)")
         
-        # Bulk index with vectors
-        if len(all_name_vecs) == len(documents):
-            self.bulk_index_with_vectors(documents, all_name_vecs, all_desc_vecs, all_comb_vecs)
+        by_text = dict(zip(unique_texts, vectors))
+        return (
+            documents,
+            [by_text[text] for text in names],
+            [by_text[text] for text in descriptions],
+            [by_text[text] for text in combined]
+        )
     
-    def run(self):
-        """Main processing loop"""
-        print(f"🚀 Starting embedding generation: {self.source_index} → {self.target_index}")
-        print(f"⚙️  Batch size: {BATCH_SIZE}, Embedding batch: {MAX_EMBEDDING_BATCH}")
-        print("")
+    def read_stage(self, pit_id: str, slice_id: int):
+        """Read one slice of the source index into the embedding queue"""
+        try:
+            for sort_key, batch in self.read_slice(pit_id, slice_id, self.committed.get(slice_id)):
+                with self.lock:
+                    seq = self.read_seq[slice_id]
+                    self.read_seq[slice_id] += 1
+                self.embed_queue.put((slice_id, seq, sort_key, batch))
+                self.read_stats.add(len(batch))
+        except Exception as e:
+            # The slice stays incomplete; --resume continues it from the last checkpoint
+            print(f"❌ Reader error: {e}")
+            return
         
-        batch_num = 0
-        for batch in self.scroll_documents():
-            batch_num += 1
-            batch_start = time.time()
-            
-            self.process_batch(batch)
+        with self.lock:
+            self.readers_finished.add(slice_id)
+            self.check_slice_exhausted(slice_id)
+    
+    def retry_stage(self):
+        """Re-read documents that failed in a previous run and queue them again"""
+        retry_ids = sorted(self.retry_ids)
+        for seq, i in enumerate(range(0, len(retry_ids), BATCH_SIZE)):
+            ids = retry_ids[i:i+BATCH_SIZE]
+            with self.lock:
+                self.retry_batches[seq] = ids
+            try:
+                response = requests.post(
+                    f"{OPENSEARCH_URL}/{self.source_index}/_mget",
+                    json={"ids": ids, "_source": SOURCE_FIELDS},
+                    headers={"Content-Type": "application/json"},
+                    timeout=60
+                )
+                response.raise_for_status()
+                batch = [doc for doc in response.json().get("docs", []) if doc.get("found")]
+            except Exception as e:
+                print(f"❌ Failed to fetch {len(ids)} failed IDs for retry: {e}")
+                self.complete_batch(None, seq, None, ids)
+                continue
             
-            batch_time = time.time() - batch_start
+            # IDs that no longer exist in the source don't need retrying
+            if batch:
+                self.embed_queue.put((None, seq, None, batch))
+                self.read_stats.add(len(batch))
+            else:
+                self.complete_batch(None, seq, None, [])
+    
+    def embed_stage(self):
+        """Embed batches from the embedding queue and hand them to the bulk writers"""
+        while True:
+            item = self.embed_queue.get()
+            if item is _DONE:
+                return
+            slice_id, seq, sort_key, batch = item
+            try:
+                embedded = self.process_batch(batch)
+            except Exception as e:
+                print(f"❌ Embedding worker error: {e}")
+                self.add_errors(len(batch))
+                embedded = None
+            if embedded is None:
+                self.complete_batch(slice_id, seq, sort_key, [str(doc["_id"]) for doc in batch])
+                continue
+            self.embed_stats.add(len(embedded[0]))
+            self.bulk_queue.put((slice_id, seq, sort_key, embedded))
+    
+    def bulk_stage(self):
+        """Index embedded batches from the bulk queue"""
+        while True:
+            item = self.bulk_queue.get()
+            if item is _DONE:
+                return
+            slice_id, seq, sort_key, embedded = item
+            batch_start = time.time()
+            failed_ids = self.bulk_index_with_vectors(*embedded)
+            self.complete_batch(slice_id, seq, sort_key, failed_ids)
+            self.bulk_stats.add(len(embedded[0]))
+            self.report_progress(len(embedded[0]), time.time() - batch_start)
+    
+    def report_progress(self, batch_docs: int, batch_time: float):
+        with self.lock:
+            self.batch_num += 1
             elapsed = time.time() - self.start_time
-            rate = self.processed_count / elapsed if elapsed > 0 else 0
+            total_elapsed = self.elapsed()
+            rate = self.processed_count / total_elapsed if total_elapsed > 0 else 0
             
-            print(f"✅ Batch {batch_num}: Processed {len(batch)} docs in {batch_time:.1f}s "
+            print(f"✅ Batch {self.batch_num}: Indexed {batch_docs} docs in {batch_time:.1f}s "
                   f"| Total: {self.processed_count:,} docs ({rate:.1f} docs/sec) "
                   f"| Errors: {self.error_count}")
+            print(f"   ↳ Queues: embed {self.embed_queue.qsize()}/{self.embed_queue.maxsize}, "
+                  f"bulk {self.bulk_queue.qsize()}/{self.bulk_queue.maxsize} "
+                  f"| Stage rates: read {self.read_stats.rate(elapsed):.1f}, "
+                  f"embed {self.embed_stats.rate(elapsed):.1f}, "
+                  f"bulk {self.bulk_stats.rate(elapsed):.1f} docs/sec")
+    
+    def run(self):
+        """Run the reader, embedding workers and bulk writers until the source is exhausted"""
+        print(f"🚀 Starting embedding generation: {self.source_index} → {self.target_index}")
+        print(f"⚙️  Batch size: {BATCH_SIZE}, Read slices: {self.slices}, "
+              f"Embedding workers: {self.embedding_workers}, Bulk writers: {self.bulk_writers}")
+        print(f"📊 Total documents to process: {self.count_documents():,}")
+        print("")
+        
+        try:
+            pit_id = self.open_point_in_time()
+        except Exception as e:
+            print(f"❌ Failed to open point-in-time on {self.source_index}: {e}")
+            return
+        
+        pending_slices = [i for i in range(self.slices) if i not in self.exhausted_slices]
+        for i in pending_slices:
+            self.read_seq[i] = 0
+            self.next_commit[i] = 0
+            self.done_batches[i] = {}
+        
+        readers = [threading.Thread(target=self.read_stage, args=(pit_id, i), name=f"read-{i}", daemon=True)
+                   for i in pending_slices]
+        if self.retry_ids:
+            readers.append(threading.Thread(target=self.retry_stage, name="retry", daemon=True))
+        embedders = [threading.Thread(target=self.embed_stage, name=f"embed-{i}", daemon=True)
+                     for i in range(self.embedding_workers)]
+        writers = [threading.Thread(target=self.bulk_stage, name=f"bulk-{i}", daemon=True)
+                   for i in range(self.bulk_writers)]
+        
+        for thread in readers + embedders + writers:
+            thread.start()
+        
+        for thread in readers:
+            thread.join()
+        self.close_point_in_time(pit_id)
+        for _ in embedders:
+            self.embed_queue.put(_DONE)
+        for thread in embedders:
+            thread.join()
+        for _ in writers:
+            self.bulk_queue.put(_DONE)
+        for thread in writers:
+            thread.join()
+        self.indexer.close()
+        
+        with self.lock:
+            self.save_checkpoint(force=True)
         
         # Final summary
-        total_time = time.time() - self.start_time
+        total_time = self.elapsed()
         print("")
         print("=" * 70)
         print(f"✅ COMPLETE!")
         print(f"📊 Processed: {self.processed_count:,} documents")
         print(f"❌ Errors: {self.error_count}")
         print(f"⏱️  Total time: {total_time:.1f}s ({self.processed_count/total_time:.1f} docs/sec)")
+        if self.checkpoint_path is not None:
+            incomplete = self.slices - len(self.exhausted_slices)
+            if incomplete or self.failed_ids:
+                print(f"♻️  {incomplete} incomplete slices, {len(self.failed_ids):,} failed IDs "
+                      f"- rerun with --resume to continue")
+            print(f"📍 Checkpoint: {self.checkpoint_path}")
+        if self.store is not None:
+            lookups = self.store.hits + self.store.misses
+            hit_rate = self.store.hits / lookups * 100 if lookups else 0
+            print(f"💾 Embedding store: {self.store.hits:,} reused, {self.store.misses:,} computed "
+                  f"({hit_rate:.1f}% reused)")
         print("=" * 70)
 
 
@@ -269,6 +583,9 @@ def verify_services():
         response = requests.get(f"{EMBEDDING_SERVICE_URL}/health", timeout=5)
         if response.status_code == 200:
             health = response.json()
+            if not health.get("ready", True):
+                print(f"❌ Embedding Service: {health['model']} is still loading (see /ready)")
+                return False
             print(f"✅ Embedding Service: {health['model']} ({health['dimensions']} dims)")
         else:
             print(f"❌ Embedding Service: HTTP {response.status_code}")
@@ -281,6 +598,15 @@ def verify_services():
     return True
 
 
+def get_embedding_model() -> str:
+    """Model name reported by the embedding service, used to key the embedding store"""
+    try:
+        response = requests.get(f"{EMBEDDING_SERVICE_URL}/health", timeout=5)
+        return response.json().get("model", DEFAULT_MODEL)
+    except Exception:
+        return DEFAULT_MODEL
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate embeddings for OpenSearch documents")
     parser.add_argument("--module", required=True, 
@@ -290,6 +616,22 @@ def main():
                        help="Suffix for source index (default: none)")
     parser.add_argument("--target-suffix", default="_v2", 
                        help="Suffix for target index (default: _v2)")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH,
+                       help=f"Persistent embedding store (default: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--no-store", action="store_true",
+                       help="Always call the embedding service, ignoring the embedding store")
+    parser.add_argument("--slices", type=int, default=READ_SLICES,
+                       help=f"Concurrent point-in-time slices to read (default: {READ_SLICES})")
+    parser.add_argument("--checkpoint", default=None,
+                       help="Checkpoint file (default: scripts/.state/embeddings-<source>-<target>.json)")
+    parser.add_argument("--resume", action="store_true",
+                       help="Continue from the checkpoint and retry only the IDs that failed")
+    parser.add_argument("--embed-workers", type=int, default=EMBEDDING_WORKERS,
+                       help=f"Concurrent embedding workers (default: {EMBEDDING_WORKERS})")
+    parser.add_argument("--bulk-writers", type=int, default=BULK_WRITERS,
+                       help=f"Concurrent bulk index writers (default: {BULK_WRITERS})")
+    parser.add_argument("--queue-depth", type=int, default=QUEUE_DEPTH,
+                       help=f"Batches buffered between pipeline stages (default: {QUEUE_DEPTH})")
     
     args = parser.parse_args()
     
@@ -301,9 +643,25 @@ def main():
         print("❌ Service check failed. Exiting.")
         return 1
     
+    store = None
+    if not args.no_store:
+        store = EmbeddingStore(args.store, get_embedding_model())
+        print(f"💾 Embedding store: {args.store} ({store.count():,} vectors)")
+        print("")
+    
     # Run generator
-    generator = EmbeddingGenerator(source_index, target_index)
-    generator.run()
+    generator = EmbeddingGenerator(source_index, target_index, store,
+                                   slices=args.slices,
+                                   embedding_workers=args.embed_workers,
+                                   bulk_writers=args.bulk_writers,
+                                   queue_depth=args.queue_depth,
+                                   checkpoint_path=args.checkpoint or state_path("embeddings", source_index, target_index),
+                                   resume=args.resume)
+    try:
+        generator.run()
+    finally:
+        if store is not None:
+            store.close()
     
     return 0
 
@@ -0,0 +1,254 @@
+"""
+Blue/green index generations behind aliases for Mangwale Search.
+
+A full sync builds into a new versioned index (e.g. food_items_20261018093000,
+which matches the food_items_* templates), validates it, and only then moves
+the alias to it in one atomic _aliases call, so searches never see a
+half-built index. Previous generations are kept for a few days; rolling
+back is just another alias move.
+
+bulk_load_mode() switches an index to load-optimized settings (no refresh,
+no replicas, async translog) for the duration of a load and always restores
+the previous settings afterwards.
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import requests
+
+OPENSEARCH_URL = os.getenv("OPENSEARCH_URL", "http://localhost:9200")
+
+RETENTION_DAYS = 3  # Delete generations older than this...
+MIN_PREVIOUS_GENERATIONS = 1  # ...but always keep this many for rollback
+MAX_COUNT_DROP = 0.10  # Refuse to swap if the new generation has >10% fewer docs than the live one
+SAMPLE_QUERIES = 5
+
+# Settings for the duration of a bulk load. Refreshes and replica copies are
+# pure overhead until the load is done, and an async translog avoids an
+# fsync per bulk request; the load can simply be rerun if the node dies.
+BULK_LOAD_SETTINGS = {
+    "index.refresh_interval": "-1",
+    "index.number_of_replicas": "0",
+    "index.translog.durability": "async"
+}
+FORCE_MERGE_SEGMENTS = 1
+
+
+def generation_name(alias: str, now: Optional[datetime] = None) -> str:
+    return f"{alias}_{(now or datetime.now()).strftime('%Y%m%d%H%M%S')}"
+
+
+def alias_targets(alias: str) -> List[str]:
+    """Indices the alias currently points at ([] if it isn't an alias)"""
+    response = requests.get(f"{OPENSEARCH_URL}/_alias/{alias}", timeout=10)
+    if response.status_code == 404:
+        return []
+    response.raise_for_status()
+    return list(response.json())
+
+
+def is_concrete_index(name: str) -> bool:
+    """True if `name` is a real index rather than an alias (the pre-blue/green layout)"""
+    if alias_targets(name):
+        return False
+    return requests.head(f"{OPENSEARCH_URL}/{name}", timeout=10).status_code == 200
+
+
+def generations(alias: str) -> List[Dict]:
+    """Every versioned index for the alias, newest first, as {"index", "created", "docs"}"""
+    response = requests.get(
+        f"{OPENSEARCH_URL}/_cat/indices/{alias}_*",
+        params={"format": "json", "h": "index,creation.date,docs.count"},
+        timeout=10
+    )
+    if response.status_code == 404:
+        return []
+    response.raise_for_status()
+    found = []
+    for row in response.json():
+        suffix = row["index"][len(alias) + 1:]
+        if not suffix.isdigit():
+            continue  # e.g. food_items_v2 (vector index), not a generation
+        found.append({
+            "index": row["index"],
+            "created": datetime.fromtimestamp(int(row["creation.date"]) / 1000),
+            "docs": int(row.get("docs.count") or 0)
+        })
+    return sorted(found, key=lambda g: g["created"], reverse=True)
+
+
+def count(index: str) -> int:
+    response = requests.get(f"{OPENSEARCH_URL}/{index}/_count", timeout=30)
+    return response.json().get("count", 0) if response.status_code == 200 else 0
+
+
+def create_generation(alias: str, mapping: Dict) -> Optional[str]:
+    index = generation_name(alias)
+    response = requests.put(f"{OPENSEARCH_URL}/{index}", json=mapping, timeout=30)
+    if response.status_code not in [200, 201]:
+        print(f"❌ Failed to create {index}: {response.status_code} - {response.text[:200]}")
+        return None
+    print(f"✅ Created new generation {index}")
+    return index
+
+
+def delete_index(index: str):
+    requests.delete(f"{OPENSEARCH_URL}/{index}", timeout=30)
+
+
+def validate_generation(index: str, alias: str, expected: int, max_drop: float = MAX_COUNT_DROP) -> bool:
+    """
+    Check a freshly built generation before it goes live:
+    - it holds exactly the documents the load reported as written
+    - it isn't empty, or much smaller, while the alias serves documents today
+    - sampled documents are found again by a full-text query on their name
+    """
+    requests.post(f"{OPENSEARCH_URL}/{index}/_refresh", timeout=120)
+
+    docs = count(index)
+    if docs != expected:
+        print(f"❌ Validation failed for {index}: {docs:,} documents, expected {expected:,}")
+        return False
+
+    # An empty generation is fine for a module group with no active rows, not as a replacement
+    live = count(alias) if alias_targets(alias) or is_concrete_index(alias) else 0
+    if docs == 0 and live:
+        print(f"❌ Validation failed for {index}: empty, {live:,} documents live")
+        return False
+    if live and docs < live * (1 - max_drop):
+        print(f"❌ Validation failed for {index}: {docs:,} documents vs {live:,} live "
+              f"(more than {max_drop:.0%} fewer)")
+        return False
+
+    response = requests.post(f"{OPENSEARCH_URL}/{index}/_search", json={
+        "size": SAMPLE_QUERIES,
+        "_source": ["name"],
+        "query": {"function_score": {"random_score": {}}}
+    }, timeout=30)
+    samples = [hit for hit in response.json().get("hits", {}).get("hits", []) if hit["_source"].get("name")]
+    for hit in samples:
+        response = requests.post(f"{OPENSEARCH_URL}/{index}/_count", json={
+            "query": {"bool": {
+                "must": {"match": {"name": hit["_source"]["name"]}},
+                "filter": {"ids": {"values": [hit["_id"]]}}
+            }}
+        }, timeout=30)
+        if response.json().get("count") != 1:
+            print(f"❌ Validation failed for {index}: sample query for '{hit['_source']['name']}' "
+                  f"did not return document {hit['_id']}")
+            return False
+
+    print(f"✅ Validated {index}: {docs:,} documents (live: {live:,}), {len(samples)} sample queries")
+    return True
+
+
+def swap_alias(alias: str, index: str) -> bool:
+    """Point the alias at `index` in one atomic _aliases call"""
+    actions = [{"remove": {"index": old, "alias": alias}} for old in alias_targets(alias) if old != index]
+    if is_concrete_index(alias):
+        # First blue/green run: the live data is a plain index with the alias's name.
+        # It has to go in the same atomic call, or the alias can't be created.
+        print(f"⚠️  {alias} is a concrete index; replacing it with an alias (no rollback to it)")
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": index, "alias": alias}})
+
+    response = requests.post(f"{OPENSEARCH_URL}/_aliases", json={"actions": actions}, timeout=30)
+    if response.status_code != 200:
+        print(f"❌ Alias swap {alias} → {index} failed: {response.status_code} - {response.text[:200]}")
+        return False
+    print(f"🔀 {alias} → {index}")
+    return True
+
+
+def prune_generations(alias: str, retention_days: int = RETENTION_DAYS,
+                      keep: int = MIN_PREVIOUS_GENERATIONS) -> List[str]:
+    """Delete old generations that are no longer live, keeping the newest `keep` for rollback"""
+    live = set(alias_targets(alias))
+    previous = [g for g in generations(alias) if g["index"] not in live]
+    cutoff = datetime.now() - timedelta(days=retention_days)
+
+    deleted = []
+    for generation in previous[keep:]:
+        if generation["created"] < cutoff:
+            delete_index(generation["index"])
+            deleted.append(generation["index"])
+    if deleted:
+        print(f"🗑️  Deleted old generations of {alias}: {', '.join(deleted)}")
+    return deleted
+
+
+def rollback(alias: str) -> Optional[str]:
+    """Point the alias back at the newest generation older than the live one"""
+    live = alias_targets(alias)
+    history = generations(alias)
+    live_created = max((g["created"] for g in history if g["index"] in live), default=None)
+    for generation in history:
+        if generation["index"] not in live and (live_created is None or generation["created"] < live_created):
+            return generation["index"] if swap_alias(alias, generation["index"]) else None
+    print(f"⚠️  No previous generation of {alias} to roll back to")
+    return None
+
+
+def get_settings(index: str, keys) -> Dict[str, str]:
+    """Current values of the given flat setting keys, falling back to the cluster defaults"""
+    response = requests.get(f"{OPENSEARCH_URL}/{index}/_settings",
+                            params={"flat_settings": "true", "include_defaults": "true"}, timeout=10)
+    response.raise_for_status()
+    current = {}
+    for body in response.json().values():
+        for key in keys:
+            value = body.get("settings", {}).get(key, body.get("defaults", {}).get(key))
+            if value is not None:
+                current.setdefault(key, value)
+    return current
+
+
+def put_settings(index: str, settings: Dict[str, str]) -> bool:
+    response = requests.put(f"{OPENSEARCH_URL}/{index}/_settings", json=settings, timeout=30)
+    if response.status_code != 200:
+        print(f"❌ Failed to update settings of {index}: {response.status_code} - {response.text[:200]}")
+        return False
+    return True
+
+
+@contextmanager
+def bulk_load_mode(index: str, force_merge: bool = False):
+    """
+    Apply BULK_LOAD_SETTINGS to the index for the duration of the block.
+    Only use it on a new generation that isn't serving searches yet: a live
+    index would lose its replicas and stop showing updates.
+
+    With `force_merge` the index is force-merged on a clean exit (a live
+    index keeps taking updates, and one huge merged segment is expensive to
+    maintain). Either way the previous settings are restored and the index
+    refreshed once, even if the load or the merge raised.
+    """
+    original = get_settings(index, BULK_LOAD_SETTINGS)
+    put_settings(index, BULK_LOAD_SETTINGS)
+    print(f"⚙️  {index}: bulk-load settings (refresh off, 0 replicas, async translog)")
+
+    loaded = False
+    try:
+        yield
+        loaded = True
+    finally:
+        if loaded and force_merge:
+            # Best effort: a merge that times out must not skip the restore below
+            started = datetime.now()
+            try:
+                response = requests.post(f"{OPENSEARCH_URL}/{index}/_forcemerge",
+                                         params={"max_num_segments": FORCE_MERGE_SEGMENTS}, timeout=3600)
+                response.raise_for_status()
+                print(f"🧱 {index}: force-merged to {FORCE_MERGE_SEGMENTS} segment(s) "
+                      f"in {(datetime.now() - started).total_seconds():.1f}s")
+            except requests.RequestException as e:
+                print(f"⚠️  {index}: force-merge failed after "
+                      f"{(datetime.now() - started).total_seconds():.1f}s: {e}")
+        if put_settings(index, original):
+            print(f"⚙️  {index}: restored settings {original}")
+        else:
+            print(f"❌ {index}: restore these settings by hand: {original}")
+        requests.post(f"{OPENSEARCH_URL}/{index}/_refresh", timeout=120)
@@ -0,0 +1,40 @@
+"""
+Durable local state for long-running indexing jobs (checkpoints, watermarks).
+
+State is a JSON document under scripts/.state/. Writes go to a temporary
+file that is fsynced and renamed over the old one, so a crash mid-write
+never leaves a truncated checkpoint behind.
+"""
+
+import json
+import os
+import re
+from typing import Optional
+
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".state")
+
+
+def state_path(*parts: str) -> str:
+    """Path of a state file under STATE_DIR, e.g. state_path("embeddings", "food_items") -> .state/embeddings-food_items.json"""
+    name = "-".join(re.sub(r"[^A-Za-z0-9_.]+", "_", part) for part in parts)
+    return os.path.join(STATE_DIR, f"{name}.json")
+
+
+def load_state(path: str) -> Optional[dict]:
+    """Load a state file, or None if it doesn't exist"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_state(path: str, state: dict):
+    """Atomically replace the state file"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
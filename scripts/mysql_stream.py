@@ -0,0 +1,71 @@
+"""
+Streaming MySQL reads for the Mangwale Search sync scripts.
+
+Instead of cursor.fetchall() over a whole catalog, rows are read in keyset
+pages ordered by primary key (`WHERE ... AND i.id > last_id ORDER BY i.id
+LIMIT n`). Each page is a short indexed range scan, so memory stays flat
+regardless of catalog size, the first rows arrive immediately, and no
+long-lived result set is held open while the bulk writers apply
+backpressure.
+
+stream_changes() pages the same way over (updated_at, id) for incremental
+syncs.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+PAGE_SIZE = 1000
+EPOCH = datetime(1970, 1, 1)
+
+
+def stream_by_id(conn, query: str, params: Sequence[Any] = (), id_column: str = "i.id",
+                 id_field: str = "id", page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the rows of `query` in ascending id order, one keyset page at a time.
+
+    `query` must end with its WHERE clause; the id condition, ORDER BY and
+    LIMIT are appended. `id_column` is the SQL expression for the key and
+    `id_field` its name in the result rows.
+    """
+    sql = f"{query.rstrip()} AND {id_column} > %s ORDER BY {id_column} LIMIT %s"
+    cursor = conn.cursor(dictionary=True)
+    last_id = -1
+    try:
+        while True:
+            cursor.execute(sql, (*params, last_id, page_size))
+            rows = cursor.fetchall()
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][id_field]
+    finally:
+        cursor.close()
+
+
+def stream_changes(conn, query: str, params: Sequence[Any] = (), since: Optional[Tuple[datetime, int]] = None,
+                   updated_column: str = "i.updated_at", id_column: str = "i.id",
+                   updated_field: str = "updated_at", id_field: str = "id",
+                   page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the rows of `query` modified after the (updated_at, id) watermark
+    `since`, in (updated_at, id) order, one keyset page at a time.
+
+    The id tiebreaker makes the watermark exact even when many rows share
+    one updated_at second. Rows with a NULL updated_at are never returned;
+    a full sync covers those.
+    """
+    sql = (f"{query.rstrip()} AND ({updated_column} > %s OR ({updated_column} = %s AND {id_column} > %s))"
+           f" ORDER BY {updated_column}, {id_column} LIMIT %s")
+    last_updated, last_id = since or (EPOCH, -1)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        while True:
+            cursor.execute(sql, (*params, last_updated, last_updated, last_id, page_size))
+            rows = cursor.fetchall()
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_updated, last_id = rows[-1][updated_field], rows[-1][id_field]
+    finally:
+        cursor.close()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+MySQL ↔ OpenSearch reconciliation for Mangwale Search.
+
+Finds documents that have drifted from MySQL without a full resync:
+
+1. The id space of an entity is split into RANGE_FANOUT ranges. For each
+   range, MySQL computes the row count and a checksum of the compared
+   columns in one GROUP BY (SUM of CRC32 per row); OpenSearch streams just
+   the `id` and those fields for the same range and computes the same
+   checksum locally.
+2. Ranges that match are done. Ranges that differ are split again, until
+   they hold at most LEAF_SIZE documents.
+3. In a differing leaf range, rows and documents are compared one by one.
+   Missing or stale documents are upserted from MySQL and documents with
+   no active row are deleted.
+
+The result is a repair batch: --output writes it as _bulk NDJSON, --apply
+sends it through BulkIndexer. Upserts are partial updates, so vectors on
+the indexed documents survive. Exits 1 if drift was found and not
+repaired, so it can run from cron as a check.
+
+IMPORTANT: This script ONLY READS from MySQL. All writes go to OpenSearch.
+
+Usage:
+    python3 reconcile.py                                   # items, food + ecom, report only
+    python3 reconcile.py --entity items,stores --modules food
+    python3 reconcile.py --output repair.ndjson            # write the repair batch
+    python3 reconcile.py --apply                           # send the repair batch
+"""
+
+import argparse
+import sys
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import requests
+
+from bulk_indexer import BulkIndexer, encode_entry
+from mysql_stream import stream_by_id
+from sync_engine import (OPENSEARCH_URL, MYSQL_CONFIG, MODULE_GROUPS, ITEMS, STORES, CATEGORIES,
+                         EntitySpec, connect_mysql, resolve_entities, resolve_modules)
+
+RANGE_FANOUT = 16  # Sub-ranges per differing range
+LEAF_SIZE = 2000  # Compare row by row once a differing range holds this few documents
+SCROLL_SIZE = 5000
+
+# Columns compared per entity, as (column of the spec's query, document field, kind).
+# They are the values the transforms copy verbatim, plus updated_at, which
+# changes with every write to the row. "time" columns compare at second
+# precision in the document's ISO format.
+CHECKSUM_COLUMNS = {
+    ITEMS.name: [
+        ("id", "id", "int"), ("updated_at", "updated_at", "time"), ("status", "status", "int"),
+        ("name", "name", "str"), ("store_id", "store_id", "int"), ("category_id", "category_id", "int"),
+        ("store_name", "store_name", "str"), ("zone_id", "zone_id", "int")
+    ],
+    STORES.name: [
+        ("id", "id", "int"), ("updated_at", "updated_at", "time"), ("status", "status", "int"),
+        ("name", "name", "str"), ("zone_id", "zone_id", "int")
+    ],
+    CATEGORIES.name: [
+        ("id", "id", "int"), ("updated_at", "updated_at", "time"), ("status", "status", "int"),
+        ("name", "name", "str"), ("parent_id", "parent_id", "int")
+    ]
+}
+
+ISO_SECONDS = "%Y-%m-%dT%H:%i:%s"  # MySQL DATE_FORMAT for to_iso() without microseconds
+
+
+class RangeSummary(NamedTuple):
+    docs: int
+    checksum: int
+
+
+class ReconcileResult(NamedTuple):
+    index: str
+    ranges_compared: int
+    docs_compared: int
+    missing: int
+    stale: int
+    extra: int
+    repairs: List[tuple]  # (action, source) pairs for BulkIndexer.send()
+
+
+# Checksums
+
+def checksum_text(value, kind: str) -> str:
+    """One column as MySQL renders it inside the checksum's CONCAT_WS"""
+    if value is None:
+        return ""
+    if kind == "time":
+        return value.strftime("%Y-%m-%dT%H:%M:%S") if hasattr(value, "strftime") else str(value)[:19]
+    return str(value)
+
+
+def row_checksum(values: Dict, columns: List[tuple], field_index: int) -> int:
+    """CRC32 of one row or document; field_index picks the column (0) or document field (1) name"""
+    text = "|".join(checksum_text(values.get(column[field_index]), column[2]) for column in columns)
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def checksum_sql(columns: List[tuple]) -> str:
+    parts = []
+    for column, _, kind in columns:
+        expression = f"DATE_FORMAT(t.{column}, '{ISO_SECONDS}')" if kind == "time" else f"t.{column}"
+        parts.append(f"COALESCE({expression}, '')")
+    return f"CRC32(CONCAT_WS('|', {', '.join(parts)}))"
+
+
+def range_buckets(low: int, high: int) -> Tuple[int, List[Tuple[int, int]]]:
+    """Split [low, high] into at most RANGE_FANOUT equal-width ranges"""
+    width = max(1, -(-(high - low + 1) // RANGE_FANOUT))
+    return width, [(start, min(high, start + width - 1)) for start in range(low, high + 1, width)]
+
+
+# MySQL side
+
+class MySQLSide:
+    def __init__(self, conn, spec: EntitySpec, module_ids: List[int]):
+        self.conn = conn
+        self.spec = spec
+        self.params = tuple(module_ids)
+        query = spec.query.format(modules=','.join(['%s'] * len(module_ids)))
+        self.query = f"{query.rstrip()} AND {spec.active_condition}"
+        self.columns = CHECKSUM_COLUMNS[spec.name]
+
+    def _fetch(self, sql: str, params: tuple) -> List[tuple]:
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def bounds(self) -> Optional[Tuple[int, int]]:
+        low, high = self._fetch(f"SELECT MIN(t.id), MAX(t.id) FROM ({self.query}) AS t", self.params)[0]
+        return None if low is None else (int(low), int(high))
+
+    def summarize(self, low: int, high: int, width: int) -> Dict[int, RangeSummary]:
+        """Count and checksum per width-sized bucket of [low, high], in one aggregate query"""
+        sql = (f"SELECT FLOOR((t.id - %s) / %s) AS bucket, COUNT(*), SUM({checksum_sql(self.columns)})"
+               f" FROM ({self.query} AND {self.spec.id_column} BETWEEN %s AND %s) AS t GROUP BY bucket")
+        rows = self._fetch(sql, (low, width, *self.params, low, high))
+        return {int(bucket): RangeSummary(int(docs), int(checksum or 0)) for bucket, docs, checksum in rows}
+
+    def rows(self, low: int, high: int) -> Iterator[Dict]:
+        return stream_by_id(self.conn, f"{self.query} AND {self.spec.id_column} BETWEEN %s AND %s",
+                            (*self.params, low, high), self.spec.id_column)
+
+
+# OpenSearch side
+
+class OpenSearchSide:
+    def __init__(self, index: str, spec: EntitySpec):
+        self.index = index
+        self.columns = CHECKSUM_COLUMNS[spec.name]
+        self.fields = [field for _, field, _ in self.columns]
+
+    def bounds(self) -> Optional[Tuple[int, int]]:
+        response = requests.post(f"{OPENSEARCH_URL}/{self.index}/_search", json={
+            "size": 0, "aggs": {"low": {"min": {"field": "id"}}, "high": {"max": {"field": "id"}}}
+        }, timeout=30)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        aggs = response.json()["aggregations"]
+        if aggs["low"]["value"] is None:
+            return None
+        return int(aggs["low"]["value"]), int(aggs["high"]["value"])
+
+    def documents(self, low: int, high: int) -> Iterator[Dict]:
+        """The compared fields of every document with low <= id <= high, in id order"""
+        search_after = None
+        while True:
+            body = {
+                "size": SCROLL_SIZE,
+                "_source": self.fields,
+                "query": {"range": {"id": {"gte": low, "lte": high}}},
+                "sort": [{"id": "asc"}]
+            }
+            if search_after:
+                body["search_after"] = search_after
+            response = requests.post(f"{OPENSEARCH_URL}/{self.index}/_search", json=body, timeout=120)
+            response.raise_for_status()
+            hits = response.json()["hits"]["hits"]
+            for hit in hits:
+                yield {**hit["_source"], "_id": hit["_id"]}
+            if len(hits) < SCROLL_SIZE:
+                return
+            search_after = hits[-1]["sort"]
+
+    def summarize(self, low: int, high: int, width: int) -> Dict[int, RangeSummary]:
+        docs: Dict[int, int] = {}
+        checksums: Dict[int, int] = {}
+        for doc in self.documents(low, high):
+            bucket = (int(doc["id"]) - low) // width
+            docs[bucket] = docs.get(bucket, 0) + 1
+            checksums[bucket] = checksums.get(bucket, 0) + row_checksum(doc, self.columns, 1)
+        return {bucket: RangeSummary(count, checksums[bucket]) for bucket, count in docs.items()}
+
+
+# Reconciliation
+
+def reconcile_entity(conn, spec: EntitySpec, group: str, module_ids: List[int]) -> ReconcileResult:
+    index = spec.index_name(group)
+    print(f"\n{'='*70}")
+    print(f"Reconciling {group} {spec.name} (modules: {module_ids}) against {index}")
+    print(f"{'='*70}")
+
+    mysql_side = MySQLSide(conn, spec, module_ids)
+    search_side = OpenSearchSide(index, spec)
+    columns = CHECKSUM_COLUMNS[spec.name]
+    counts = {"ranges": 0, "docs": 0, "missing": 0, "stale": 0, "extra": 0}
+    repairs = []
+
+    def compare_leaf(low: int, high: int):
+        documents = {int(doc["id"]): doc for doc in search_side.documents(low, high)}
+        for row in mysql_side.rows(low, high):
+            counts["docs"] += 1
+            doc = documents.pop(int(row["id"]), None)
+            if doc is not None and row_checksum(row, columns, 0) == row_checksum(doc, columns, 1):
+                continue
+            counts["missing" if doc is None else "stale"] += 1
+            document = spec.transform(row)
+            repairs.append(({"update": {"_index": index, "_id": str(document["id"])}},
+                            {"doc": document, "doc_as_upsert": True}))
+        for doc in documents.values():
+            counts["extra"] += 1
+            repairs.append(({"delete": {"_index": index, "_id": doc["_id"]}}, None))
+
+    def compare(low: int, high: int):
+        width, ranges = range_buckets(low, high)
+        expected = mysql_side.summarize(low, high, width)
+        actual = search_side.summarize(low, high, width)
+        for bucket, (start, end) in enumerate(ranges):
+            counts["ranges"] += 1
+            want = expected.get(bucket, RangeSummary(0, 0))
+            have = actual.get(bucket, RangeSummary(0, 0))
+            if want == have:
+                counts["docs"] += want.docs
+                continue
+            print(f"🔍 {index} ids {start}-{end}: MySQL {want.docs:,} rows, OpenSearch {have.docs:,} documents"
+                  f"{'' if want.docs != have.docs else ' (checksum differs)'}")
+            if max(want.docs, have.docs) <= LEAF_SIZE or end == start:
+                compare_leaf(start, end)
+            else:
+                compare(start, end)
+
+    started = datetime.now()
+    bounds = [b for b in (mysql_side.bounds(), search_side.bounds()) if b]
+    if bounds:
+        compare(min(b[0] for b in bounds), max(b[1] for b in bounds))
+
+    result = ReconcileResult(index, counts["ranges"], counts["docs"], counts["missing"],
+                             counts["stale"], counts["extra"], repairs)
+    status = "✅" if not repairs else "⚠️ "
+    print(f"{status} {index}: {len(repairs):,} repairs ({result.missing:,} missing, {result.stale:,} stale, "
+          f"{result.extra:,} extra) after {result.ranges_compared:,} ranges "
+          f"in {(datetime.now() - started).total_seconds():.1f}s")
+    return result
+
+
+def write_repairs(path: str, repairs: List[tuple]):
+    with open(path, "wb") as f:
+        for action, source in repairs:
+            f.write(encode_entry(action, source).data)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Find and repair drift between MySQL and OpenSearch (READ-ONLY on MySQL)")
+    parser.add_argument("--entity", default=ITEMS.name,
+                        help=f"Comma-separated entities to check: {', '.join(CHECKSUM_COLUMNS)} or all (default: items)")
+    parser.add_argument("--modules", default=",".join(MODULE_GROUPS),
+                        help=f"Comma-separated module groups ({', '.join(MODULE_GROUPS)}) or module ids (default: all groups)")
+    parser.add_argument("--output", default=None, help="Write the repair batch to this file as _bulk NDJSON")
+    parser.add_argument("--apply", action="store_true", help="Send the repair batch to OpenSearch")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = resolve_entities(args.entity)
+        groups = resolve_modules(args.modules)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"{'='*70}")
+    print("  MySQL ↔ OpenSearch Reconciliation")
+    print(f"  MySQL: {MYSQL_CONFIG['host']}:{MYSQL_CONFIG['port']}/{MYSQL_CONFIG['database']} (READ-ONLY)")
+    print(f"  OpenSearch: {OPENSEARCH_URL}")
+    print(f"{'='*70}")
+
+    conn = connect_mysql()
+    try:
+        results = [reconcile_entity(conn, spec, group, module_ids)
+                   for group, module_ids in groups.items() for spec in specs]
+    finally:
+        conn.close()
+
+    repairs = [repair for result in results for repair in result.repairs]
+    if args.output:
+        write_repairs(args.output, repairs)
+        print(f"\n💾 Wrote {len(repairs):,} repairs to {args.output}")
+
+    failed = 0
+    if args.apply and repairs:
+        with BulkIndexer(OPENSEARCH_URL, name="reconcile") as indexer:
+            failed = indexer.send(repairs).failed
+        print(f"\n🔧 Applied {len(repairs) - failed:,}/{len(repairs):,} repairs")
+
+    print(f"\n{'='*70}")
+    print("SUMMARY")
+    print(f"{'='*70}")
+    for result in results:
+        print(f"{result.index:<20} {result.docs_compared:>8,} compared  {result.missing:,} missing  "
+              f"{result.stale:,} stale  {result.extra:,} extra")
+    print(f"{'='*70}\n")
+
+    if failed:
+        return 1
+    return 1 if repairs and not args.apply else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
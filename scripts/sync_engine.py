@@ -0,0 +1,938 @@
+#!/usr/bin/env python3
+"""
+Declarative MySQL → OpenSearch sync engine for Mangwale Search.
+
+Each entity (items, stores, categories) is described once by an EntitySpec:
+its source SQL, the row → document transform, the index mapping and the
+target index per module group. Every entity goes through the same streaming
+reader (mysql_stream.stream_by_id) and the same bulk writer (BulkIndexer),
+so an improvement to either lands for all of them.
+
+IMPORTANT: This engine ONLY READS from MySQL. All writes go to OpenSearch.
+
+Usage:
+    python3 sync_engine.py                                  # everything, food + ecom
+    python3 sync_engine.py --entity items --modules food
+    python3 sync_engine.py --entity stores,categories --modules 4,5
+    python3 sync_engine.py --entity items --fields category_id,store_name
+    python3 sync_engine.py --mode incremental               # only rows changed since the last run
+    python3 sync_engine.py --entity items --rollback        # alias back to the previous generation
+
+Full syncs build a new index generation (e.g. food_items_20261018093000),
+validate it and atomically swap the alias, so searches never see a
+half-built index (see index_versions.py).
+
+Incremental syncs keep a per-entity (updated_at, id) watermark under
+scripts/.state/, so they can run every minute at a fraction of the load of
+a full sync.
+
+Partial updates (--fields) first read the indexed values of those fields
+and only send documents whose values differ, so a rerun with nothing to
+change costs one scan of the index and no writes.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import sys
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone, tzinfo
+from decimal import InvalidOperation
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import mysql.connector
+import requests
+
+import index_versions
+from bulk_indexer import BulkIndexer
+from job_state import load_state, save_state, state_path
+from mysql_stream import stream_by_id, stream_changes, PAGE_SIZE
+
+OPENSEARCH_URL = os.getenv("OPENSEARCH_URL", "http://localhost:9200")
+MYSQL_CONFIG = {
+    'host': os.getenv("MYSQL_HOST", "100.121.40.69"),
+    'port': int(os.getenv("MYSQL_PORT", "23306")),
+    'user': os.getenv("MYSQL_USER", "root"),
+    'password': os.getenv("MYSQL_PASSWORD", "rootpassword"),
+    'database': os.getenv("MYSQL_DATABASE", "mangwale_db")
+}
+
+# Zone TIMESTAMP columns are read in: an IANA name or an offset like +05:30.
+# When set, every session is pinned to it; otherwise the server's own zone
+# applies. The CDC consumer converts Debezium's UTC timestamps to the same zone.
+MYSQL_TIME_ZONE = os.getenv("MYSQL_TIME_ZONE")
+
+# Module groups and the module_ids that belong to them. Each group has its
+# own set of indices: {group}_items, {group}_stores, {group}_categories.
+MODULE_GROUPS = {
+    "food": [4, 6, 11, 15],  # Food, Tiffin's, Cake, Dessert
+    "ecom": [2, 5, 7, 9, 12, 13, 16, 17]  # Grocery, Shop, etc.
+}
+
+MODES = ["full", "incremental"]
+
+# Incremental watermarks never pass the snapshot time minus this lag: a row
+# stamped earlier (Laravel sets updated_at from the app clock before commit)
+# may commit after the snapshot. Upserts are idempotent, so re-reading it is free.
+WATERMARK_LAG = timedelta(seconds=int(os.getenv("SYNC_WATERMARK_LAG_SECONDS", "60")))
+
+# Item fields copied from the stores JOIN (see item_store_fields)
+ITEM_STORE_FIELDS = ["store_name", "zone_id", "delivery_time", "store_location", "store_latitude", "store_longitude"]
+
+
+# Field conversions shared by every transform
+
+def to_int(value, default: Optional[int] = 0) -> Optional[int]:
+    try:
+        return int(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def to_float(value, default: Optional[float] = 0.0) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else default
+    except (TypeError, ValueError, InvalidOperation):
+        return default
+
+
+def to_str(value, default: str = "") -> str:
+    return str(value) if value is not None else default
+
+
+def to_iso(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def geo_point(lat, lon) -> Optional[Dict[str, float]]:
+    """{"lat", "lon"} from the varchar latitude/longitude columns, or None if either is missing or invalid"""
+    lat, lon = to_float(lat, None), to_float(lon, None)
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return {"lat": lat, "lon": lon}
+
+
+def add_timestamps(doc: Dict, row: Dict) -> Dict:
+    for field in ("created_at", "updated_at"):
+        if row.get(field):
+            doc[field] = to_iso(row[field])
+    return doc
+
+
+# Transforms (MySQL row → OpenSearch document)
+
+def item_document(row: Dict) -> Dict:
+    doc = {
+        "id": row['id'],
+        "name": row['name'] or "",
+        "description": row['description'] or "",
+        "price": to_float(row['price']),
+        "veg": to_int(row['veg']),
+        "status": to_int(row['status']),
+        "store_id": row['store_id'],
+        "category_id": row['category_id'],
+        "category_name": row['category_name'] or "",
+        "available_time_starts": to_str(row['available_time_starts']),
+        "available_time_ends": to_str(row['available_time_ends']),
+        "avg_rating": to_float(row['avg_rating']),
+        "rating_count": to_int(row['rating_count']),
+        "order_count": to_int(row['order_count']),
+        "image": row['image'] or "",
+        "module_id": row['module_id']
+    }
+
+    doc.update(item_store_fields({
+        "name": row['store_name'],
+        "latitude": row['store_latitude'],
+        "longitude": row['store_longitude'],
+        "zone_id": row['zone_id'],
+        "delivery_time": row['delivery_time']
+    }))
+    return add_timestamps(doc, row)
+
+
+def item_store_fields(store: Dict) -> Dict:
+    """The copies of a stores row that every item of that store carries"""
+    fields = {
+        "store_name": store['name'] or "",
+        "zone_id": store['zone_id'],
+        "delivery_time": store['delivery_time'] or ""
+    }
+    location = geo_point(store['latitude'], store['longitude'])
+    if location:
+        fields['store_location'] = location
+        fields['store_latitude'] = location['lat']
+        fields['store_longitude'] = location['lon']
+    return fields
+
+
+def store_document(row: Dict) -> Dict:
+    doc = {
+        "id": row['id'],
+        "name": row['name'] or "",
+        "slug": row['slug'] or "",
+        "phone": row['phone'] or "",
+        "email": row['email'] or "",
+        "logo": row['logo'] or "",
+        "cover_photo": row['cover_photo'] or "",
+        "image": row['logo'] or row['cover_photo'] or "",
+        "address": row['address'] or "",
+        "status": to_int(row['status']),
+        "active": to_int(row['active']),
+        "veg": to_int(row['veg']),
+        "non_veg": to_int(row['non_veg']),
+        "delivery": to_int(row['delivery'], 1),
+        "take_away": to_int(row['take_away'], 1),
+        "delivery_time": row['delivery_time'] or "",
+        "zone_id": row['zone_id'],
+        "module_id": row['module_id'],
+        "module_name": row['module_name'] or "",
+        "minimum_order": to_float(row['minimum_order']),
+        "order_count": to_int(row['order_count']),
+        "total_order": to_int(row['total_order']),
+        "featured": to_int(row['featured']),
+        "avg_rating": 0.0,  # stores.rating is a JSON histogram, not a number
+        "rating_count": 0
+    }
+
+    location = geo_point(row['latitude'], row['longitude'])
+    if location:
+        doc['location'] = location
+        doc['latitude'] = location['lat']
+        doc['longitude'] = location['lon']
+
+    return add_timestamps(doc, row)
+
+
+def category_document(row: Dict) -> Dict:
+    doc = {
+        "id": row['id'],
+        "name": row['name'] or "",
+        "slug": row['slug'] or "",
+        "image": row['image'] or "",
+        "parent_id": to_int(row['parent_id'], None),
+        "position": to_int(row['position']),
+        "status": to_int(row['status']),
+        "featured": to_int(row['featured']),
+        "module_id": row['module_id'],
+        "module_name": row['module_name'] or ""
+    }
+    return add_timestamps(doc, row)
+
+
+# Mappings
+
+TEXT_WITH_KEYWORD = {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}}
+
+VECTOR_FIELD = {
+    "type": "knn_vector",
+    "dimension": 384,
+    "method": {
+        "name": "hnsw",
+        "space_type": "cosinesimil",
+        "engine": "nmslib",
+        "parameters": {"ef_construction": 128, "m": 16}
+    }
+}
+
+# Every generation is created with the serving replica count: bulk_load_mode()
+# drops to 0 during the load and restores this before the alias swap
+INDEX_SETTINGS = {
+    "number_of_shards": 1,
+    "number_of_replicas": int(os.getenv("OPENSEARCH_REPLICAS", "1"))
+}
+
+ITEM_MAPPING = {
+    "settings": {"index": {**INDEX_SETTINGS, "knn": True}},
+    "mappings": {
+        "properties": {
+            "id": {"type": "long"},
+            "name": TEXT_WITH_KEYWORD,
+            "description": {"type": "text"},
+            "price": {"type": "float"},
+            "veg": {"type": "integer"},
+            "status": {"type": "integer"},
+            "store_id": {"type": "long"},
+            "store_name": TEXT_WITH_KEYWORD,
+            "category_id": {"type": "long"},
+            "category_name": TEXT_WITH_KEYWORD,
+            "zone_id": {"type": "long"},
+            "delivery_time": {"type": "keyword"},
+            "available_time_starts": {"type": "keyword"},
+            "available_time_ends": {"type": "keyword"},
+            "avg_rating": {"type": "float"},
+            "rating_count": {"type": "integer"},
+            "order_count": {"type": "integer"},
+            "image": {"type": "keyword"},
+            "module_id": {"type": "integer"},
+            "store_location": {"type": "geo_point"},
+            "store_latitude": {"type": "float"},
+            "store_longitude": {"type": "float"},
+            "created_at": {"type": "date"},
+            "updated_at": {"type": "date"},
+            "name_vector": VECTOR_FIELD,
+            "description_vector": VECTOR_FIELD,
+            "combined_vector": VECTOR_FIELD
+        }
+    }
+}
+
+STORE_MAPPING = {
+    "settings": {"index": INDEX_SETTINGS},
+    "mappings": {
+        "properties": {
+            "id": {"type": "long"},
+            "name": TEXT_WITH_KEYWORD,
+            "slug": {"type": "keyword"},
+            "phone": {"type": "keyword"},
+            "email": {"type": "keyword"},
+            "logo": {"type": "keyword"},
+            "cover_photo": {"type": "keyword"},
+            "image": {"type": "keyword"},
+            "address": {"type": "text"},
+            "location": {"type": "geo_point"},
+            "latitude": {"type": "float"},
+            "longitude": {"type": "float"},
+            "status": {"type": "integer"},
+            "active": {"type": "integer"},
+            "veg": {"type": "integer"},
+            "non_veg": {"type": "integer"},
+            "delivery": {"type": "integer"},
+            "take_away": {"type": "integer"},
+            "delivery_time": {"type": "keyword"},
+            "zone_id": {"type": "long"},
+            "module_id": {"type": "integer"},
+            "module_name": {"type": "keyword"},
+            "minimum_order": {"type": "float"},
+            "order_count": {"type": "integer"},
+            "total_order": {"type": "integer"},
+            "featured": {"type": "integer"},
+            "avg_rating": {"type": "float"},
+            "rating_count": {"type": "integer"},
+            "created_at": {"type": "date"},
+            "updated_at": {"type": "date"}
+        }
+    }
+}
+
+CATEGORY_MAPPING = {
+    "settings": {"index": INDEX_SETTINGS},
+    "mappings": {
+        "properties": {
+            "id": {"type": "long"},
+            "name": TEXT_WITH_KEYWORD,
+            "slug": {"type": "keyword"},
+            "image": {"type": "keyword"},
+            "parent_id": {"type": "long"},
+            "position": {"type": "integer"},
+            "status": {"type": "integer"},
+            "featured": {"type": "integer"},
+            "module_id": {"type": "integer"},
+            "module_name": {"type": "keyword"},
+            "created_at": {"type": "date"},
+            "updated_at": {"type": "date"}
+        }
+    }
+}
+
+
+# Entity specs
+
+class EntitySpec(NamedTuple):
+    """
+    Everything the engine needs to sync one entity.
+
+    `query` must end with its WHERE clause and contain a {modules}
+    placeholder for the module_id list; the reader appends the keyset
+    condition on `id_column` (and `updated_column` in incremental mode).
+    Full syncs only read rows matching `active_condition`; incremental
+    syncs read every changed row and delete the inactive ones.
+    """
+    name: str
+    query: str
+    id_column: str
+    updated_column: str
+    active_condition: str
+    transform: Callable[[Dict], Dict]
+    mapping: Dict
+
+    def index_name(self, group: str) -> str:
+        return f"{group}_{self.name}"
+
+    @property
+    def document_fields(self) -> List[str]:
+        """Mapped fields the transform writes: everything but the vectors other jobs fill in"""
+        return [name for name, field in self.mapping["mappings"]["properties"].items()
+                if field.get("type") != "knn_vector"]
+
+
+ITEMS = EntitySpec(
+    name="items",
+    query="""
+        SELECT
+            i.id, i.name, i.description, i.price, i.veg,
+            i.status, i.store_id, i.category_id,
+            i.available_time_starts, i.available_time_ends,
+            i.avg_rating, i.rating_count, i.order_count,
+            i.image, i.module_id, i.created_at, i.updated_at,
+            s.name as store_name,
+            s.latitude as store_latitude,
+            s.longitude as store_longitude,
+            s.zone_id,
+            s.delivery_time,
+            c.name as category_name
+        FROM items i
+        LEFT JOIN stores s ON i.store_id = s.id
+        LEFT JOIN categories c ON i.category_id = c.id
+        WHERE i.module_id IN ({modules})
+    """,
+    id_column="i.id",
+    updated_column="i.updated_at",
+    active_condition="i.status = 1",
+    transform=item_document,
+    mapping=ITEM_MAPPING
+)
+
+STORES = EntitySpec(
+    name="stores",
+    query="""
+        SELECT
+            s.id, s.name, s.slug, s.phone, s.email, s.logo, s.cover_photo,
+            s.latitude, s.longitude, s.address,
+            s.status, s.active, s.veg, s.non_veg, s.delivery, s.take_away,
+            s.delivery_time, s.zone_id, s.module_id, s.minimum_order,
+            s.order_count, s.total_order, s.featured,
+            s.created_at, s.updated_at,
+            m.module_name
+        FROM stores s
+        LEFT JOIN modules m ON s.module_id = m.id
+        WHERE s.module_id IN ({modules})
+    """,
+    id_column="s.id",
+    updated_column="s.updated_at",
+    active_condition="s.status = 1",
+    transform=store_document,
+    mapping=STORE_MAPPING
+)
+
+CATEGORIES = EntitySpec(
+    name="categories",
+    query="""
+        SELECT
+            c.id, c.name, c.slug, c.image, c.parent_id, c.position,
+            c.status, c.featured, c.module_id,
+            c.created_at, c.updated_at,
+            m.module_name
+        FROM categories c
+        LEFT JOIN modules m ON c.module_id = m.id
+        WHERE c.module_id IN ({modules})
+    """,
+    id_column="c.id",
+    updated_column="c.updated_at",
+    active_condition="c.status = 1",
+    transform=category_document,
+    mapping=CATEGORY_MAPPING
+)
+
+ENTITIES = {spec.name: spec for spec in (ITEMS, STORES, CATEGORIES)}
+
+
+# Engine
+
+class SyncResult(NamedTuple):
+    index: str
+    read: int
+    written: int
+    deleted: int
+    failed: int
+    unchanged: int = 0
+
+
+def connect_mysql():
+    """Open a MySQL connection and put the session in read-only mode where permitted"""
+    conn = mysql.connector.connect(**MYSQL_CONFIG)
+    cursor = conn.cursor()
+    try:
+        if MYSQL_TIME_ZONE:
+            cursor.execute("SET time_zone = %s", (MYSQL_TIME_ZONE,))
+        cursor.execute("SET SESSION TRANSACTION READ ONLY")
+    except mysql.connector.Error as e:
+        print(f"⚠️  Could not set read-only mode (continuing): {e}")
+    finally:
+        cursor.close()
+    return conn
+
+
+def parse_time_zone(value: str) -> tzinfo:
+    """MySQL time_zone syntax: an offset like +05:30, or a named zone"""
+    match = re.fullmatch(r"([+-])(\d{1,2}):(\d{2})", value.strip())
+    if match:
+        offset = timedelta(hours=int(match.group(2)), minutes=int(match.group(3)))
+        return timezone(-offset if match.group(1) == "-" else offset)
+    return ZoneInfo(value.strip())
+
+
+def mysql_time_zone(ask_server: bool = True) -> tzinfo:
+    """
+    The zone full syncs read TIMESTAMP columns in: MYSQL_TIME_ZONE, or the
+    server's current UTC offset (UTC if MySQL can't be reached, or without
+    `ask_server`).
+    """
+    if MYSQL_TIME_ZONE:
+        return parse_time_zone(MYSQL_TIME_ZONE)
+    if not ask_server:
+        return timezone.utc
+    try:
+        conn = connect_mysql()
+    except mysql.connector.Error as e:
+        print(f"⚠️  Could not ask MySQL for its time zone, assuming UTC: {e}")
+        return timezone.utc
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW())")
+        seconds = cursor.fetchall()[0][0]
+        cursor.close()
+    finally:
+        conn.close()
+    return timezone(timedelta(seconds=int(seconds)))
+
+
+def database_now(conn) -> datetime:
+    """Current time on the MySQL server, so watermarks never depend on this host's clock"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT NOW()")
+        return cursor.fetchall()[0][0]
+    finally:
+        cursor.close()
+
+
+def begin_snapshot(conn) -> datetime:
+    """
+    End the connection's open transaction and start a fresh consistent
+    snapshot for the next entity's reads. Autocommit is off, so without
+    this a whole run would read from the snapshot of its first SELECT.
+    Returns the server time taken just before the snapshot: anything the
+    snapshot misses is updated at or after it (less WATERMARK_LAG for
+    transactions stamped before they commit), so the next incremental run
+    picks it up as long as the watermark stays at or below it.
+    """
+    conn.commit()
+    started_at = database_now(conn)
+    conn.commit()
+    conn.start_transaction(consistent_snapshot=True)
+    return started_at
+
+
+def ensure_index(index: str, mapping: Dict) -> bool:
+    """Create the index with the spec's mapping unless it (or an alias of that name) already exists"""
+    response = requests.head(f"{OPENSEARCH_URL}/{index}", timeout=10)
+    if response.status_code == 200:
+        return True
+
+    response = requests.put(f"{OPENSEARCH_URL}/{index}", json=mapping, timeout=30)
+    if response.status_code in [200, 201]:
+        print(f"✅ Created {index} index")
+        return True
+
+    print(f"❌ Failed to create {index}: {response.status_code} - {response.text[:200]}")
+    return False
+
+
+# Store → item fan-out
+
+FAN_OUT_CHUNK = 500  # Stores per _update_by_query request
+
+# Copies each store's fields onto its items; items that already match are noops (no new doc version)
+FAN_OUT_SCRIPT = """
+def store = params.stores[String.valueOf(ctx._source.store_id)];
+if (store == null) { ctx.op = 'noop'; return; }
+boolean changed = false;
+for (entry in store.set.entrySet()) {
+    if (ctx._source[entry.getKey()] != entry.getValue()) {
+        ctx._source[entry.getKey()] = entry.getValue();
+        changed = true;
+    }
+}
+for (field in store.unset) {
+    if (ctx._source.containsKey(field)) {
+        ctx._source.remove(field);
+        changed = true;
+    }
+}
+if (!changed) { ctx.op = 'noop'; }
+"""
+
+
+def fan_out_stores(group: str, stores: List[Dict]) -> Optional[int]:
+    """
+    Copy the denormalized fields of changed stores (see item_store_fields)
+    onto their items in {group}_items with an _update_by_query on store_id.
+
+    A store edit then costs O(items in that store) instead of rewriting
+    the catalog. Returns the number of items updated, or None on failure.
+    """
+    index = ITEMS.index_name(group)
+    updated = noops = 0
+
+    for i in range(0, len(stores), FAN_OUT_CHUNK):
+        chunk = stores[i:i + FAN_OUT_CHUNK]
+        params = {}
+        for store in chunk:
+            fields = item_store_fields(store)
+            params[str(store['id'])] = {"set": fields, "unset": [f for f in ITEM_STORE_FIELDS if f not in fields]}
+
+        response = requests.post(
+            f"{OPENSEARCH_URL}/{index}/_update_by_query",
+            params={"conflicts": "proceed", "slices": "auto"},
+            json={
+                "query": {"terms": {"store_id": [store['id'] for store in chunk]}},
+                "script": {"lang": "painless", "source": FAN_OUT_SCRIPT, "params": {"stores": params}}
+            },
+            timeout=600
+        )
+        body = response.json() if response.status_code == 200 else {}
+        if response.status_code != 200 or body.get("failures"):
+            print(f"❌ Store fan-out to {index} failed: {response.status_code} - "
+                  f"{(body.get('failures') or response.text)!s:.200}")
+            return None
+        updated += body.get("updated", 0)
+        noops += body.get("noops", 0)
+
+    print(f"🔁 {index}: {len(stores)} changed store(s) → {updated:,} items updated, {noops:,} already current")
+    return updated
+
+
+# Field diffs
+
+FINGERPRINT_SCROLL_SIZE = 5000
+
+
+def fingerprint(values: Dict) -> bytes:
+    """
+    Hash of a document's values for the synced fields, as they serialize to
+    JSON. Null and missing fields hash the same, so a field the update sets
+    to null matches an indexed document without it.
+    """
+    present = {field: value for field, value in values.items() if value is not None}
+    return hashlib.md5(json.dumps(present, sort_keys=True, default=str).encode("utf-8")).digest()
+
+
+def indexed_fingerprints(index: str, fields: List[str]) -> Optional[Dict[str, bytes]]:
+    """
+    Fingerprint of `fields` for every document in the index, keyed by _id,
+    read with one scroll over just those source fields. None if the index
+    can't be read.
+    """
+    response = requests.post(
+        f"{OPENSEARCH_URL}/{index}/_search",
+        params={"scroll": "2m"},
+        json={"size": FINGERPRINT_SCROLL_SIZE, "sort": ["_doc"], "_source": fields},
+        timeout=120
+    )
+    if response.status_code != 200:
+        print(f"⚠️  Could not read indexed {', '.join(fields)} from {index}: {response.status_code}")
+        return None
+
+    fingerprints = {}
+    body = response.json()
+    try:
+        while body.get("hits", {}).get("hits"):
+            for hit in body["hits"]["hits"]:
+                source = hit.get("_source", {})
+                fingerprints[hit["_id"]] = fingerprint({field: source.get(field) for field in fields})
+            response = requests.post(f"{OPENSEARCH_URL}/_search/scroll",
+                                     json={"scroll": "2m", "scroll_id": body["_scroll_id"]}, timeout=120)
+            if response.status_code != 200:
+                print(f"⚠️  Scroll over {index} failed: {response.status_code}")
+                return None
+            body = response.json()
+    finally:
+        if body.get("_scroll_id"):
+            requests.delete(f"{OPENSEARCH_URL}/_search/scroll", json={"scroll_id": body["_scroll_id"]}, timeout=10)
+
+    print(f"🧮 Fingerprinted {len(fingerprints):,} documents in {index}")
+    return fingerprints
+
+
+# Watermarks
+
+def watermark_path(spec: EntitySpec, module_ids: List[int]) -> str:
+    return state_path("sync", spec.name, *map(str, module_ids))
+
+
+def load_watermark(spec: EntitySpec, module_ids: List[int]) -> Optional[Tuple[datetime, int]]:
+    """The (updated_at, id) of the last row synced for these modules, or None before the first sync"""
+    state = load_state(watermark_path(spec, module_ids))
+    if not state:
+        return None
+    return datetime.fromisoformat(state["updated_at"]), state["id"]
+
+
+def save_watermark(spec: EntitySpec, module_ids: List[int], watermark: Tuple[datetime, int]):
+    save_state(watermark_path(spec, module_ids), {
+        "entity": spec.name,
+        "module_ids": module_ids,
+        "updated_at": watermark[0].isoformat(),
+        "id": watermark[1],
+        "synced_at": datetime.now().isoformat()
+    })
+
+
+def sync_entity(conn, spec: EntitySpec, group: str, module_ids: List[int], mode: str = "full",
+                fields: Optional[List[str]] = None, diff: bool = True, limit: Optional[int] = None,
+                in_place: bool = False, keep_days: int = index_versions.RETENTION_DAYS,
+                max_drop: float = index_versions.MAX_COUNT_DROP) -> SyncResult:
+    """
+    Stream one entity for one module group into its index.
+
+    full: build a new generation of the index, validate it and swap the
+    alias to it (or, with `in_place`, index every active row into the live
+    index), then set the watermark to the time the run started.
+    incremental: read only rows changed since the watermark, upsert the
+    active ones and delete the ones whose status went to 0. Changed stores
+    are also fanned out to their items. Without a watermark yet,
+    incremental falls back to a full sync.
+
+    With `fields`, only those fields are sent as partial updates, so
+    everything else on the indexed documents (e.g. vectors) is preserved.
+    With `diff` as well, documents whose indexed values already match
+    are skipped, as are rows with no document in the index to update.
+    The watermark only advances after a complete run with no failures.
+    """
+    index = spec.index_name(group)
+    since = load_watermark(spec, module_ids) if mode == "incremental" else None
+    if mode == "incremental" and since is None:
+        print(f"\nℹ️  No watermark yet for {group} {spec.name}, running a full sync first")
+        mode = "full"
+
+    print(f"\n{'='*70}")
+    print(f"Syncing {group} {spec.name} (modules: {module_ids}) to {index} [{mode}]")
+    if since:
+        print(f"Changes since {since[0]} (id > {since[1]})")
+    if fields:
+        print(f"Updating fields: {', '.join(fields)}")
+    print(f"{'='*70}")
+
+    # Full loads build a fresh generation behind the alias; partial and test loads write in place
+    rebuild = mode == "full" and not (fields or limit or in_place)
+    if rebuild:
+        target = index_versions.create_generation(index, spec.mapping)
+        if not target:
+            return SyncResult(index, 0, 0, 0, 0)
+    else:
+        target = index
+        if not fields and not ensure_index(index, spec.mapping):
+            return SyncResult(index, 0, 0, 0, 0)
+
+    # A rebuild that doesn't end with the alias on the new generation must not leave it
+    # behind: rollback() and prune_generations() would take it for a valid previous one
+    try:
+        # Indexed values of the partial-update fields, to skip documents that already match
+        known = indexed_fingerprints(target, fields) if fields and diff else None
+
+        started_at = begin_snapshot(conn)
+        placeholders = ','.join(['%s'] * len(module_ids))
+        query = spec.query.format(modules=placeholders)
+        if mode == "full":
+            rows = stream_by_id(conn, f"{query.rstrip()} AND {spec.active_condition}", tuple(module_ids), spec.id_column)
+            print(f"📊 Streaming {spec.name} in pages of {PAGE_SIZE}")
+        else:
+            rows = stream_changes(conn, query, tuple(module_ids), since, spec.updated_column, spec.id_column)
+            print(f"📊 Streaming changed {spec.name} in pages of {PAGE_SIZE}")
+        if limit:
+            rows = itertools.islice(rows, limit)
+
+        total = 0
+        deletes = 0
+        unchanged = missing = 0
+        last_row = None
+        changed_stores = []
+
+        # New generations load with refresh, replicas and translog fsyncs relaxed; the
+        # index settings are restored afterwards even if the load fails. In-place
+        # loads write to the serving index, so they keep its settings.
+        indexer = BulkIndexer(OPENSEARCH_URL, name=target)
+        with index_versions.bulk_load_mode(target, force_merge=True) if rebuild else nullcontext(), indexer:
+            for row in rows:
+                total += 1
+                last_row = row
+                if mode == "incremental" and to_int(row['status']) != 1:
+                    indexer.delete(target, row['id'])
+                    deletes += 1
+                    continue
+
+                if spec is STORES and mode == "incremental":
+                    changed_stores.append(row)
+
+                doc = spec.transform(row)
+                if fields:
+                    # Fields the transform leaves out (e.g. store_location without coordinates) are nulled
+                    values = {field: doc.get(field) for field in fields}
+                    if known is not None:
+                        current = known.get(str(doc['id']))
+                        if current is None:
+                            missing += 1
+                            continue
+                        if current == fingerprint(values):
+                            unchanged += 1
+                            continue
+                    indexer.update(target, doc['id'], values)
+                elif mode == "incremental":
+                    # Upsert as a partial update so fields written by other jobs (vectors) survive
+                    indexer.update(target, doc['id'], doc, doc_as_upsert=True)
+                else:
+                    indexer.index(target, doc['id'], doc)
+
+        result = indexer.result
+        print(f"🎉 {group} {spec.name} complete: {result.succeeded}/{total}"
+              f"{f' ({deletes} deletes)' if deletes else ''}"
+              f"{f' ({result.failed} failed)' if result.failed else ''}")
+        if known is not None:
+            print(f"🧮 {total - deletes - unchanged - missing:,} changed, {unchanged:,} unchanged"
+                  f"{f', {missing:,} not in {target} (skipped)' if missing else ''}")
+
+        if rebuild:
+            swapped = (not result.failed
+                       and index_versions.validate_generation(target, index, result.succeeded, max_drop)
+                       and index_versions.swap_alias(index, target))
+            if not swapped:
+                print(f"❌ {index} left on its current generation; deleting {target}")
+                index_versions.delete_index(target)
+                return SyncResult(index, total, 0, 0, total)
+    except BaseException:
+        # Unless the alias already points at it (a swap that timed out but went through)
+        if rebuild and target not in index_versions.alias_targets(index):
+            print(f"❌ Load into {target} aborted; deleting it")
+            index_versions.delete_index(target)
+        raise
+
+    if rebuild:
+        index_versions.prune_generations(index, keep_days)
+
+    # Items carry copies of store fields; push edits to just the items of the changed stores
+    fan_out_failed = bool(changed_stores) and fan_out_stores(group, changed_stores) is None
+
+    if result.failed or fan_out_failed or limit or fields:
+        print(f"⚠️  Watermark for {group} {spec.name} not advanced")
+    elif mode == "full":
+        save_watermark(spec, module_ids, (started_at - WATERMARK_LAG, 0))
+    elif last_row:
+        save_watermark(spec, module_ids, min((last_row['updated_at'], last_row['id']),
+                                             (started_at - WATERMARK_LAG, 0)))
+
+    deleted = deletes - sum(1 for failure in result.failures if failure.op == "delete")
+    return SyncResult(index, total, result.succeeded - deleted, deleted, result.failed, unchanged)
+
+
+def resolve_modules(value: str) -> Dict[str, List[int]]:
+    """Parse --modules ("food,ecom", "4,5", ...) into {group: [module_id, ...]}"""
+    group_of = {module_id: group for group, ids in MODULE_GROUPS.items() for module_id in ids}
+    selected: Dict[str, List[int]] = {}
+
+    for token in filter(None, (t.strip() for t in value.split(","))):
+        if token in MODULE_GROUPS:
+            selected.setdefault(token, [])
+            selected[token].extend(MODULE_GROUPS[token])
+        elif token.isdigit() and int(token) in group_of:
+            selected.setdefault(group_of[int(token)], []).append(int(token))
+        else:
+            raise ValueError(f"unknown module '{token}' (expected {', '.join(MODULE_GROUPS)} or one of their module ids)")
+
+    return {group: sorted(set(ids)) for group, ids in selected.items()}
+
+
+def resolve_entities(value: str) -> List[EntitySpec]:
+    names = [t.strip() for t in value.split(",") if t.strip()]
+    if "all" in names:
+        return list(ENTITIES.values())
+    unknown = [name for name in names if name not in ENTITIES]
+    if unknown:
+        raise ValueError(f"unknown entity {', '.join(unknown)} (expected {', '.join(ENTITIES)} or all)")
+    return [ENTITIES[name] for name in names]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sync MySQL entities into OpenSearch (READ-ONLY on MySQL)")
+    parser.add_argument("--entity", default="all",
+                        help=f"Comma-separated entities to sync: {', '.join(ENTITIES)} or all (default: all)")
+    parser.add_argument("--modules", default=",".join(MODULE_GROUPS),
+                        help=f"Comma-separated module groups ({', '.join(MODULE_GROUPS)}) or module ids (default: all groups)")
+    parser.add_argument("--mode", choices=MODES, default="full",
+                        help="full: stream every active row (default); "
+                             "incremental: only rows changed since the last run, deleting deactivated ones")
+    parser.add_argument("--fields", default=None,
+                        help="Only update these document fields (partial update, keeps vectors)")
+    parser.add_argument("--no-diff", action="store_true",
+                        help="With --fields, update every document instead of only those whose values changed")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Stop after this many rows per entity and module group (for testing, implies --in-place)")
+    parser.add_argument("--in-place", action="store_true",
+                        help="Full sync straight into the live index instead of a new generation behind the alias")
+    parser.add_argument("--keep-days", type=int, default=index_versions.RETENTION_DAYS,
+                        help=f"Keep previous index generations this many days (default: {index_versions.RETENTION_DAYS})")
+    parser.add_argument("--max-drop", type=float, default=index_versions.MAX_COUNT_DROP,
+                        help=f"Refuse to swap if the new generation has this fraction fewer documents than live "
+                             f"(default: {index_versions.MAX_COUNT_DROP})")
+    parser.add_argument("--rollback", action="store_true",
+                        help="Point each selected alias back at its previous generation and exit")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = resolve_entities(args.entity)
+        groups = resolve_modules(args.modules)
+    except ValueError as e:
+        parser.error(str(e))
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+    for spec in specs if fields else []:
+        # A partial update sends null for a field the transform doesn't write, erasing it everywhere
+        unknown = [field for field in fields if field not in spec.document_fields]
+        if unknown:
+            parser.error(f"--fields {', '.join(unknown)} not written by the {spec.name} sync "
+                         f"(expected some of: {', '.join(spec.document_fields)})")
+
+    if args.rollback:
+        rolled_back = [index_versions.rollback(spec.index_name(group)) for group in groups for spec in specs]
+        return 0 if all(rolled_back) else 1
+
+    print(f"{'='*70}")
+    print(f"  MySQL → OpenSearch Sync ({args.mode})")
+    print(f"  MySQL: {MYSQL_CONFIG['host']}:{MYSQL_CONFIG['port']}/{MYSQL_CONFIG['database']} (READ-ONLY)")
+    print(f"  OpenSearch: {OPENSEARCH_URL}")
+    print(f"  Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*70}")
+
+    conn = connect_mysql()
+    results = []
+    try:
+        for group, module_ids in groups.items():
+            for spec in specs:
+                results.append(sync_entity(conn, spec, group, module_ids, mode=args.mode,
+                                           fields=fields, diff=not args.no_diff, limit=args.limit, in_place=args.in_place,
+                                           keep_days=args.keep_days, max_drop=args.max_drop))
+    finally:
+        conn.close()
+
+    print(f"\n{'='*70}")
+    print("SUMMARY")
+    print(f"{'='*70}")
+    for result in results:
+        print(f"{result.index:<20} {result.written:>8,}/{result.read:,}"
+              f"{f'  ({result.unchanged:,} unchanged)' if result.unchanged else ''}"
+              f"{f'  ({result.deleted:,} deleted)' if result.deleted else ''}"
+              f"{f'  ({result.failed:,} failed)' if result.failed else ''}")
+    print(f"{'='*70}")
+    print(f"{'TOTAL':<20} {sum(r.written for r in results):>8,}")
+    print(f"{'='*70}\n")
+
+    return 1 if any(r.failed for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Zone lookup for Mangwale Search: which delivery zone a lat/lon falls in.
+
+Zones are parsed once into compact coordinate arrays with a bounding box
+each, and the boxes are bucketed into a uniform grid. A lookup only runs the
+exact point-in-polygon test against the few zones whose box overlaps the
+point's grid cell, so resolving a point costs microseconds instead of a
+ray cast against every zone.
+
+Results are identical to checking the zones in id order with
+point_in_polygon() and taking the first match, which is what check_zone.py
+used to do.
+
+For bulk work (re-zoning every store and item after a zone redraw),
+assign_zones() tests whole arrays of points against each zone's edges
+with NumPy broadcasting, with the same results.
+
+Usage:
+    zones = load_zones(conn)
+    zones.zone_of(19.9975, 73.7898)              # -> 4 (or None)
+    zones.zones_of([(19.99, 73.78), (20.01, 73.80)])
+    zones.assign_zones(lats, lons)               # -> array of zone ids, NO_ZONE where none
+"""
+
+import math
+import re
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+GRID_CELL_DEGREES = 0.05  # ~5.5 km; zones are city-sized, so a cell rarely overlaps more than a few
+
+NO_ZONE = -1  # assign_zones() result for points outside every zone
+PIP_CHUNK_CELLS = 2_000_000  # Max points x edges per broadcast chunk (~16 MB per float64 temporary)
+
+ZONES_QUERY = "SELECT id, ST_AsText(coordinates) AS coordinates FROM zones WHERE status = 1 ORDER BY id"
+
+COORDINATE_PAIR = re.compile(r"(-?[\d.]+(?:[eE][-+]?\d+)?)\s+(-?[\d.]+(?:[eE][-+]?\d+)?)")
+
+
+class Zone(NamedTuple):
+    id: int
+    xs: array  # longitudes of the outer ring
+    ys: array  # latitudes of the outer ring
+    min_x: float
+    min_y: float
+    max_x: float
+    max_y: float
+
+
+def parse_wkt(wkt: Optional[str]) -> List[Tuple[float, float]]:
+    """(x, y) = (lon, lat) pairs of a POLYGON's outer ring, or [] for anything else"""
+    if not wkt or not wkt.startswith('POLYGON'):
+        return []
+    outer_ring = wkt[wkt.index('(') + 1:].lstrip('(').split(')')[0]
+    return [(float(x), float(y)) for x, y in COORDINATE_PAIR.findall(outer_ring)]
+
+
+def point_in_polygon(x: float, y: float, xs: Sequence[float], ys: Sequence[float]) -> bool:
+    """
+    Ray-casting test, edge for edge the same as check_zone.py's original
+    is_point_in_polygon, including its handling of points on edges and
+    vertices.
+    """
+    inside = False
+    n = len(xs)
+    p1x, p1y = xs[0], ys[0]
+    for i in range(n + 1):
+        p2x, p2y = xs[i % n], ys[i % n]
+        if y > min(p1y, p2y) and y <= max(p1y, p2y) and x <= max(p1x, p2x):
+            # p1y == p2y can't get here: y would have to be both > and <= it
+            if p1x == p2x or x <= (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x:
+                inside = not inside
+        p1x, p1y = p2x, p2y
+    return inside
+
+
+def points_in_polygon(xs: np.ndarray, ys: np.ndarray, polygon_xs: Sequence[float],
+                      polygon_ys: Sequence[float]) -> np.ndarray:
+    """
+    point_in_polygon() for arrays of points at once: a (points x edges)
+    broadcast of the same comparisons and the same float64 intersection
+    formula, evaluated in the same order, so boundary points come out
+    exactly as in the loop. Points are processed in chunks of at most
+    PIP_CHUNK_CELLS point-edge pairs to bound memory.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    # Edge k runs from vertex k to vertex k+1, closing back to vertex 0
+    p1x = np.asarray(polygon_xs, dtype=np.float64)
+    p1y = np.asarray(polygon_ys, dtype=np.float64)
+    p2x, p2y = np.roll(p1x, -1), np.roll(p1y, -1)
+    low_y, high_y, high_x = np.minimum(p1y, p2y), np.maximum(p1y, p2y), np.maximum(p1x, p2x)
+    vertical = p1x == p2x
+
+    inside = np.zeros(len(xs), dtype=bool)
+    chunk = max(1, PIP_CHUNK_CELLS // max(1, len(p1x)))
+    for start in range(0, len(xs), chunk):
+        x = xs[start:start + chunk, None]
+        y = ys[start:start + chunk, None]
+        with np.errstate(invalid="ignore"):
+            # Same expression as the loop: (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+            xinters = (y - p1y) * (p2x - p1x) / np.where(p1y != p2y, p2y - p1y, 1.0) + p1x
+        crossings = (y > low_y) & (y <= high_y) & (x <= high_x) & (vertical | (x <= xinters))
+        inside[start:start + chunk] = np.count_nonzero(crossings, axis=1) % 2 == 1
+    return inside
+
+
+class ZoneIndex:
+    """Zones bucketed by bounding box into a uniform lat/lon grid"""
+
+    def __init__(self, zones: Iterable[Tuple[int, Sequence[Tuple[float, float]]]],
+                 cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell = cell_degrees
+        self.zones: List[Zone] = []
+        self.grid: Dict[Tuple[int, int], List[int]] = {}
+
+        for zone_id, polygon in zones:
+            if not polygon:
+                continue
+            xs = array('d', (x for x, _ in polygon))
+            ys = array('d', (y for _, y in polygon))
+            zone = Zone(zone_id, xs, ys, min(xs), min(ys), max(xs), max(ys))
+            position = len(self.zones)
+            self.zones.append(zone)
+            for cx in range(self._cell(zone.min_x), self._cell(zone.max_x) + 1):
+                for cy in range(self._cell(zone.min_y), self._cell(zone.max_y) + 1):
+                    # Zones are appended in input order, so each cell's candidates stay in id order
+                    self.grid.setdefault((cx, cy), []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+    def _cell(self, degrees: float) -> int:
+        return math.floor(degrees / self.cell)
+
+    def candidates(self, lat: float, lon: float) -> List[Zone]:
+        """Zones whose bounding box contains the point, in input order"""
+        positions = self.grid.get((self._cell(lon), self._cell(lat)), ())
+        return [zone for zone in (self.zones[p] for p in positions)
+                if zone.min_x <= lon <= zone.max_x and zone.min_y <= lat <= zone.max_y]
+
+    def zone_of(self, lat: float, lon: float) -> Optional[int]:
+        """Id of the first zone containing the point, or None"""
+        for zone in self.candidates(lat, lon):
+            if point_in_polygon(lon, lat, zone.xs, zone.ys):
+                return zone.id
+        return None
+
+    def zones_of(self, points: Iterable[Tuple[Optional[float], Optional[float]]]) -> List[Optional[int]]:
+        """zone_of() for many (lat, lon) points; points with a missing coordinate get None"""
+        return [self.zone_of(lat, lon) if lat is not None and lon is not None else None
+                for lat, lon in points]
+
+    def assign_zones(self, lats, lons) -> np.ndarray:
+        """
+        Zone id for every point of two equal-length arrays (NaN for a
+        missing coordinate), NO_ZONE where no zone contains it. Each zone
+        only tests the still-unassigned points inside its bounding box.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        result = np.full(len(lats), NO_ZONE, dtype=np.int64)
+        for zone in self.zones:
+            candidates = np.flatnonzero((result == NO_ZONE)
+                                        & (lons >= zone.min_x) & (lons <= zone.max_x)
+                                        & (lats >= zone.min_y) & (lats <= zone.max_y))
+            if len(candidates):
+                hits = points_in_polygon(lons[candidates], lats[candidates], zone.xs, zone.ys)
+                result[candidates[hits]] = zone.id
+        return result
+
+
+def load_zones(conn, cell_degrees: float = GRID_CELL_DEGREES) -> ZoneIndex:
+    """Build a ZoneIndex from the active zones in MySQL (read-only)"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(ZONES_QUERY)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    return ZoneIndex(((row['id'], parse_wkt(row['coordinates'])) for row in rows), cell_degrees)